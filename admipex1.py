@@ -19,20 +19,35 @@
 # 
 # You can run this example at the command line by
 #
-#    python admipex1.py <filename>
+#    python admipex1.py [-heap] [-numpy | -loop] <filename>
 #
 # or within the python interpreter by
 #
 # >>> import admipex1
+# >>> admipex1.admipex1("data/p0033.mps")
 #
-# The user will be prompted to chose the filename.
+# With -heap, the classes HeapBranch and HeapNode are used: the branch
+# callback keeps the nodes it creates in a heap ordered like MyNode
+# orders them, so the node callback does not have to query every
+# remaining node to select one.
+#
+# MyBranch selects the branching variable with NumPy if it is installed
+# and the problem is large, and in a Python loop otherwise. With -numpy
+# or -loop, one of them is used regardless, so that the nodes per second
+# printed at the end can be compared.
 
+from heapq import heapify, heappop, heappush
 from math import floor, fabs
 
 import cplex  as CPX
 import cplex.callbacks as CPX_CB
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class MySolve(CPX_CB.SolveCallback):
 
     def __call__(self):
@@ -47,6 +62,13 @@ class MySolve(CPX_CB.SolveCallback):
 
 class MyBranch(CPX_CB.BranchCallback):
 
+    # Select the branching variable with NumPy (True) or in a Python
+    # loop (False). If None, NumPy is used if it is installed and the
+    # problem has at least numpymin columns: for smaller problems,
+    # converting the lists CPLEX returns costs more than the loop.
+    usenumpy = None
+    numpymin = 2000
+
     def __call__(self):
         self.times_called += 1
         br_type = self.get_branch_type()
@@ -56,27 +78,63 @@ class MyBranch(CPX_CB.BranchCallback):
         x = self.get_values()
 
         objval = self.get_objective_value()
-        obj    = self.get_objective_coefficients()
         feas   = self.get_feasibilities()
-        
+
+        bestj = self.select(x, feas)
+        if bestj < 0:
+            return
+        self.branch(objval, x, feas, bestj)
+
+    def select(self, x, feas):
+        """Return the variable to branch on, or -1 if all are integer
+        feasible.
+        """
+        # The objective does not change during the search, so only fetch
+        # it on the first call.
+        if not hasattr(self, "absobj"):
+            self.absobj = [fabs(c) for c in self.get_objective_coefficients()]
+            if self.usenumpy is None:
+                self.usenumpy = numpy is not None and len(x) >= self.numpymin
+            if self.usenumpy:
+                self.absobj = numpy.array(self.absobj)
+        if self.usenumpy:
+            return self.selectnumpy(x, feas)
+        absobj = self.absobj
+        infeasible = self.feasibility_status.infeasible
+
         maxobj = -CPX.infinity
         maxinf = -CPX.infinity
         bestj  = -1
 
         for j in range(len(x)):
-            if feas[j] == self.feasibility_status.infeasible:
+            if feas[j] == infeasible:
                 xj_inf = x[j] - floor(x[j])
                 if xj_inf > 0.5:
                     xj_inf = 1.0 - xj_inf
-                    
-                if (xj_inf >= maxinf and (xj_inf > maxinf or fabs(obj[j]) >= maxobj)):
+
+                if (xj_inf >= maxinf and (xj_inf > maxinf or absobj[j] >= maxobj)):
                     bestj = j
                     maxinf = xj_inf
-                    maxobj = fabs(obj[j])
+                    maxobj = absobj[j]
+        return bestj
 
-        if bestj < 0:
-            return
-        
+    def selectnumpy(self, x, feas):
+        """Same as select(), on arrays."""
+        # fromiter converts the lists CPLEX returns faster than array.
+        candidates = numpy.fromiter(feas, numpy.int8, len(feas)) == \
+                     self.feasibility_status.infeasible
+        if not candidates.any():
+            return -1
+        x = numpy.fromiter(x, float, len(x))
+        xj_inf = x - numpy.floor(x)
+        xj_inf = numpy.minimum(xj_inf, 1.0 - xj_inf)
+        # Most fractional first, then largest absolute objective
+        # coefficient, then the last index.
+        candidates &= xj_inf == xj_inf[candidates].max()
+        candidates &= self.absobj == self.absobj[candidates].max()
+        return int(numpy.flatnonzero(candidates)[-1])
+
+    def branch(self, objval, x, feas, bestj):
         xj_lo = floor(x[bestj])
         # the (bestj, xj_lo, direction) triple can be any python object to
         # associate with a node
@@ -91,10 +149,57 @@ class MyBranch(CPX_CB.BranchCallback):
         #                  float(xj_lo))], node_data = (bestj, xj_lo, "DOWN"))
 
 
+class HeapBranch(MyBranch):
+    """Branch as MyBranch does, and push the children onto the heap
+    shared with HeapNode.
+
+    The node data of a child is (bestj, xj_lo, direction, depth).
+    """
+
+    def __call__(self):
+        br_type = self.get_branch_type()
+        if br_type == self.branch_type.SOS1 or br_type == self.branch_type.SOS2:
+            # CPLEX creates the children, which are not on the heap.
+            self.selector.foreign = True
+        MyBranch.__call__(self)
+
+    def branch(self, objval, x, feas, bestj):
+        xj_lo = floor(x[bestj])
+        data = self.get_node_data()
+        if data is None:
+            depth = 1
+        else:
+            depth = data[3] + 1
+        # A child has the sum of integer infeasibilities of its parent
+        # until it is solved.
+        infeasible = self.feasibility_status.infeasible
+        siinf = 0.0
+        for j in range(len(x)):
+            if feas[j] == infeasible:
+                xj_inf = x[j] - floor(x[j])
+                siinf += min(xj_inf, 1.0 - xj_inf)
+        for bound, value, direction in [("L", xj_lo + 1, "UP"),
+                                        ("U", xj_lo, "DOWN")]:
+            node = self.make_branch(objval,
+                                    variables = [(bestj, bound, value)],
+                                    node_data = (bestj, xj_lo, direction,
+                                                 depth))
+            heappush(self.heap, (-depth, -siinf, node))
+
+
 class MyNode(CPX_CB.NodeCallback):
 
     def __call__(self):
         self.times_called += 1
+        bestnode = self.bestnode()
+        self.select_node(bestnode)
+        # get_node_data retrieves the python object the node was created with
+        # print "selected node with data", self.get_node_data(bestnode)
+
+    def bestnode(self):
+        """Return the index of the deepest remaining node, and among those
+        of the one with the largest sum of integer infeasibilities.
+        """
         bestnode = 0
         maxdepth = -1
         maxsiinf = 0.0
@@ -105,12 +210,44 @@ class MyNode(CPX_CB.NodeCallback):
                 bestnode = node
                 maxdepth = depth
                 maxsiinf = siinf
-        self.select_node(bestnode)
-        # get_node_data retrieves the python object the node was created with
-        # print "selected node with data", self.get_node_data(bestnode)
+        return bestnode
+
+
+class HeapNode(MyNode):
+    """Select nodes as MyNode does, from a heap kept up to date by
+    HeapBranch instead of a scan of all remaining nodes.
+
+    As long as HeapBranch created all remaining nodes, the heap holds
+    each of them, so it holds no other node if it has as many entries as
+    there are remaining nodes. Otherwise, for example after CPLEX pruned
+    nodes when it found a new incumbent, the entries of nodes that are
+    no longer in the tree are dropped. If the heap then still lacks
+    remaining nodes, because CPLEX created nodes itself, the remaining
+    nodes are scanned.
+    """
+
+    def __call__(self):
+        self.times_called += 1
+        remaining = self.get_num_remaining_nodes()
+        if self.foreign or len(self.heap) != remaining:
+            self.sync(remaining)
+        if self.foreign:
+            self.scans += 1
+            self.select_node(self.bestnode())
+        else:
+            self.select_node(heappop(self.heap)[2])
+
+    def sync(self, remaining):
+        """Drop the heap entries of nodes that are no longer in the tree,
+        and note whether the heap lacks some of the remaining nodes.
+        """
+        ids = set(self.get_node_ID(node) for node in range(remaining))
+        self.heap[:] = [entry for entry in self.heap if entry[2] in ids]
+        heapify(self.heap)
+        self.foreign = len(self.heap) < remaining
 
         
-def admipex1(filename):
+def admipex1(filename, heap = False, usenumpy = None):
 
     c = CPX.Cplex(filename)
 
@@ -121,16 +258,30 @@ def admipex1(filename):
     
     solve_instance  = c.register_callback(MySolve)
     solve_instance.times_called = 0
-    branch_instance = c.register_callback(MyBranch)
+    if heap:
+        # The branch callback pushes the nodes it creates onto a heap
+        # from which the node callback selects.
+        branch_instance = c.register_callback(HeapBranch)
+        node_instance   = c.register_callback(HeapNode)
+        branch_instance.heap = node_instance.heap = []
+        branch_instance.selector = node_instance
+        node_instance.foreign = False
+        node_instance.scans = 0
+    else:
+        branch_instance = c.register_callback(MyBranch)
+        node_instance   = c.register_callback(MyNode)
     branch_instance.times_called = 0
-    node_instance   = c.register_callback(MyNode)
+    if usenumpy is not None:
+        branch_instance.usenumpy = usenumpy
     node_instance.times_called = 0
 
     c.parameters.mip.interval.set(1)
     c.parameters.preprocessing.linear.set(0)
     c.parameters.mip.strategy.search.set(c.parameters.mip.strategy.search.values.traditional)
 
+    start = c.get_time()
     c.solve()
+    seconds = c.get_time() - start
 
     solution = c.solution
 
@@ -148,18 +299,29 @@ def admipex1(filename):
     print "Solve callback was called ", solve_instance.times_called, "times"
     print "Branch callback was called ", branch_instance.times_called, "times"
     print "Node callback was called ", node_instance.times_called, "times"
+    nodes = solution.progress.get_num_nodes_processed()
+    print "Processed %d nodes in %.3f sec, %.1f nodes per sec" % \
+          (nodes, seconds, nodes / max(seconds, 1e-6))
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print "Usage: admipex1.py filename"
+    args = sys.argv[1:]
+    heap = "-heap" in args
+    usenumpy = None
+    if "-numpy" in args:
+        usenumpy = True
+    elif "-loop" in args:
+        usenumpy = False
+    args = [arg for arg in args if arg not in ["-heap", "-numpy", "-loop"]]
+    if len(args) != 1 or (usenumpy and numpy is None):
+        print "Usage: admipex1.py [-heap] [-numpy | -loop] filename"
+        print "  -heap      select nodes from a heap instead of scanning"
+        print "             all remaining nodes"
+        print "  -numpy     select the branching variable with NumPy,"
+        print "             which must be installed"
+        print "  -loop      select the branching variable in a Python loop"
         print "  filename   Name of a file, with .mps, .lp, or .sav"
         print "             extension, and a possible, additional .gz"
         print "             extension"
         sys.exit(-1)
-    admipex1(sys.argv[1])
-else:
-    prompt = """Enter the path to a file with .mps, .lp, or .sav
-extension, and a possible, additional .gz extension:
-The path must be entered as a string; e.g. "my_model.mps"\n """
-    admipex1(input(prompt))
+    admipex1(args[0], heap, usenumpy)
@@ -36,6 +36,7 @@
 # >>> import blend
 
 import cplex
+from varregistry import VariableRegistry
 
 sources = ["Pure1", "Pure2", "Pure3",
            "Raw1", "Raw2",
@@ -62,49 +63,50 @@ composition = {"Element1": [0.20, 0.01, 0.00, 0.01, 0.10],
 
 def blend():
     model = cplex.Cplex()
+    registry = VariableRegistry(model)
     model.objective.set_sense(model.objective.sense.minimize)
-    model.variables.add(names = sources)
+    source = registry.add(sources, obj = costs)
+    pure = source[0:3]
+    raw = source[3:5]
+    scrap = source[5:7]
+    ingots = source[7]
     
     # to model Ingots as an integer variable, uncomment the following line.
-    # model.variables.set_types("Ingots", model.variables.type.integer)
+    # model.variables.set_types(ingots, model.variables.type.integer)
 
-    model.variables.set_upper_bounds("Ingots", 100000)
-    model.objective.set_linear(zip(sources, costs))
-    model.variables.add(names = ["Element1", "Element2", "Element3"],
-                        lb = [min * alloy for min in min_spec],
-                        ub = [max * alloy for max in max_spec])
-    model.linear_constraints.add(lin_expr =
-                                 [cplex.SparsePair(ind = ["Element1",
-                                                          "Element2",
-                                                          "Element3"],
-                                                   val = [1.0] * 3)],
-                                 senses = ["E"], rhs = [alloy])
-    mixed_sources = sources[3:]
-    for i in range(1, 4):
-        lhs = cplex.SparsePair(["Element" + str(i), "Pure" + str(i)] + mixed_sources,
-                               [-1.0, 1.0] + composition["Element" + str(i)])
-        model.linear_constraints.add(lin_expr = [lhs], senses = ["E"],
-                                     rhs = [0.0])
+    model.variables.set_upper_bounds(ingots, 100000)
+    element = registry.add(["Element1", "Element2", "Element3"],
+                           lb = [min * alloy for min in min_spec],
+                           ub = [max * alloy for max in max_spec])
+    mixed_sources = source[3:]
+    model.linear_constraints.add(
+        lin_expr = [cplex.SparsePair(ind = element, val = [1.0] * 3)] +
+                   [cplex.SparsePair([element[i], pure[i]] + mixed_sources,
+                                     [-1.0, 1.0] +
+                                     composition["Element" + str(i + 1)])
+                    for i in range(3)],
+        senses = ["E"] * 4, rhs = [alloy] + [0.0] * 3)
         
     model.solve()
 
+    x = model.solution.get_values()
     print
     print "Solution status: ", model.solution.get_status()
     print "Cost:       ", model.solution.get_objective_value()
     print "Pure metal: "
     for i in range(3):
-        print i, ")", model.solution.get_values("Pure" + str(i + 1))
+        print i, ")", x[pure[i]]
     print "Raw Material:"
     for i in range(2):
-        print i, ")", model.solution.get_values("Raw" + str(i + 1))
+        print i, ")", x[raw[i]]
     print "Raw Material:"
     for i in range(2):
-        print i, ")", model.solution.get_values("Scrap" + str(i + 1))
+        print i, ")", x[scrap[i]]
     print "Ingots:"
-    print "0) ", model.solution.get_values("Ingots")
+    print "0) ", x[ingots]
     print "Elements:"
     for i in range(3):
-        print i, ")", model.solution.get_values("Element" + str(i + 1))
+        print i, ")", x[element[i]]
     
 
 blend()
@@ -0,0 +1,212 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: buildbench.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# buildbench.py - Compare the methods of populating a problem
+#
+# lpex1.py, mipex1.py and diet.py build their problems by adding rows, by
+# adding columns, or by adding empty rows and columns and then setting the
+# coefficients as a list of nonzeros. This example generates random
+# problems of a given shape and density and times each of the three
+# methods through the Python API. Each method gets the matrix in the form
+# it needs, prepared before the clock starts, and adds everything in one
+# call.
+#
+# The time of a method is modeled as a cost per row or column added plus
+# a cost per nonzero. The function choosemethod() picks the cheapest
+# method for the statistics of a matrix. By default it uses costs that
+# only reflect the amount of data passed: a nonzero carries an index and
+# a value in a row or a column and two indices and a value as a triplet,
+# and every row or column passed costs as much as two more items for the
+# list that holds it. So setting nonzeros wins for matrices with fewer
+# than two nonzeros per row and per column. The function calibrate()
+# fits the costs to timings on this machine instead; buildbench() reports
+# the method chosen with the fitted costs.
+#
+# To run this example from the command line, use
+#
+#    python buildbench.py [rows:columns:density ...]
+#
+# for example
+#
+#    python buildbench.py 1000:100000:0.0001 100000:1000:0.0001
+
+import cplex
+import random
+import sys
+import time
+
+sizes = [(100, 100, 0.1), (1000, 1000, 0.01), (100, 10000, 0.01),
+         (10000, 100, 0.01), (10000, 10000, 0.001)]
+
+# cost per row or column added and cost per nonzero of each method
+defaultcosts = {"r": (2.0, 2.0), "c": (2.0, 2.0), "n": (0.0, 3.0)}
+
+def generate(numrows, numcols, density, seed = 0):
+    """Return (obj, rhs, triplets) for a random problem with about
+    density * numrows * numcols nonzeros, where triplets lists the
+    nonzeros as (row, column, value) sorted by row and column. Every row
+    and every column has at least one nonzero.
+    """
+    rnd = random.Random(seed)
+    nonzeros = set()
+    for i in range(numrows):
+        nonzeros.add((i, rnd.randrange(numcols)))
+    for j in range(numcols):
+        nonzeros.add((rnd.randrange(numrows), j))
+    for k in range(int(density * numrows * numcols)):
+        nonzeros.add((rnd.randrange(numrows), rnd.randrange(numcols)))
+    triplets = [(i, j, float(rnd.randint(1, 10)))
+                for i, j in sorted(nonzeros)]
+    obj = [float(rnd.randint(1, 10)) for j in range(numcols)]
+    rhs = [float(rnd.randint(10, 100)) for i in range(numrows)]
+    return obj, rhs, triplets
+
+def byrowdata(numrows, triplets):
+    """Return the matrix as a list of [indices, values] rows."""
+    rows = [[[], []] for i in range(numrows)]
+    for i, j, v in triplets:
+        rows[i][0].append(j)
+        rows[i][1].append(v)
+    return rows
+
+def bycolumndata(numcols, triplets):
+    """Return the matrix as a list of [indices, values] columns."""
+    cols = [[[], []] for j in range(numcols)]
+    for i, j, v in triplets:
+        cols[j][0].append(i)
+        cols[j][1].append(v)
+    return cols
+
+def populatebyrow(prob, obj, rhs, rows):
+    prob.objective.set_sense(prob.objective.sense.maximize)
+    prob.variables.add(obj = obj)
+    prob.linear_constraints.add(lin_expr = rows, senses = "L" * len(rhs),
+                                rhs = rhs)
+
+def populatebycolumn(prob, obj, rhs, cols):
+    prob.objective.set_sense(prob.objective.sense.maximize)
+    prob.linear_constraints.add(senses = "L" * len(rhs), rhs = rhs)
+    prob.variables.add(obj = obj, columns = cols)
+
+def populatebynonzero(prob, obj, rhs, triplets):
+    prob.objective.set_sense(prob.objective.sense.maximize)
+    prob.linear_constraints.add(senses = "L" * len(rhs), rhs = rhs)
+    prob.variables.add(obj = obj)
+    prob.linear_constraints.set_coefficients(triplets)
+
+def timepopulate(numrows, numcols, density, seed = 0):
+    """Return a dictionary with the build time of each method for a
+    generated problem, and the number of nonzeros.
+    """
+    obj, rhs, triplets = generate(numrows, numcols, density, seed)
+    tasks = [("r", populatebyrow, byrowdata(numrows, triplets)),
+             ("c", populatebycolumn, bycolumndata(numcols, triplets)),
+             ("n", populatebynonzero, triplets)]
+    times = {}
+    for method, populate, matrix in tasks:
+        prob = cplex.Cplex()
+        start = time.time()
+        populate(prob, obj, rhs, matrix)
+        times[method] = time.time() - start
+    return times, len(triplets)
+
+def vectors(method, numrows, numcols):
+    """Return the number of rows or columns passed by method."""
+    if method == "r":
+        return numrows
+    if method == "c":
+        return numcols
+    return 0
+
+def choosemethod(numrows, numcols, nonzeros, costs = defaultcosts):
+    """Return the method, "r", "c" or "n", with the least estimated
+    build time for a matrix with the given statistics.
+    """
+    best = None
+    for method in ["r", "c", "n"]:
+        pervector, pernonzero = costs[method]
+        estimate = pervector * vectors(method, numrows, numcols) + \
+                   pernonzero * nonzeros
+        if best is None or estimate < bestestimate:
+            best, bestestimate = method, estimate
+    return best
+
+def fit(points):
+    """Least squares fit of t = a * v + b * n to points (v, n, t).
+    Returns (a, b).
+    """
+    svv = sum(v * v for v, n, t in points)
+    svn = sum(v * n for v, n, t in points)
+    snn = sum(n * n for v, n, t in points)
+    svt = sum(v * t for v, n, t in points)
+    snt = sum(n * t for v, n, t in points)
+    if snn == 0:
+        # No nonzeros at all.
+        if svv == 0:
+            return 0.0, 0.0
+        return svt / svv, 0.0
+    det = svv * snn - svn * svn
+    if abs(det) <= 1e-12 * max(1.0, svv * snn):
+        # No rows or columns passed, or too few distinct shapes.
+        return 0.0, snt / snn
+    return (svt * snn - snt * svn) / det, (snt * svv - svt * svn) / det
+
+def measure(sizes):
+    """Time all methods on problems of the given sizes. Returns a list of
+    tuples (numrows, numcols, density, nonzeros, times).
+    """
+    results = []
+    for numrows, numcols, density in sizes:
+        times, nonzeros = timepopulate(numrows, numcols, density)
+        results.append((numrows, numcols, density, nonzeros, times))
+    return results
+
+def fitcosts(results):
+    """Return the costs of each method fitted to the results of
+    measure(), to be passed to choosemethod().
+    """
+    costs = {}
+    for method in ["r", "c", "n"]:
+        costs[method] = fit([(vectors(method, numrows, numcols), nonzeros,
+                              times[method])
+                             for numrows, numcols, density, nonzeros, times
+                             in results])
+    return costs
+
+def calibrate(sizes = sizes):
+    """Return costs fitted to timings on problems of the given sizes."""
+    return fitcosts(measure(sizes))
+
+def buildbench(sizes):
+    print "%8s %8s %10s %10s %10s %10s %10s %8s" % \
+          ("rows", "columns", "density", "nonzeros", "byrow", "bycolumn",
+           "bynonzero", "chosen")
+    results = measure(sizes)
+    costs = fitcosts(results)
+    for numrows, numcols, density, nonzeros, times in results:
+        print "%8d %8d %10g %10d %10.3f %10.3f %10.3f %8s" % \
+              (numrows, numcols, density, nonzeros, times["r"], times["c"],
+               times["n"], choosemethod(numrows, numcols, nonzeros, costs))
+    print
+    print "Fitted costs per row or column and per nonzero (microseconds):"
+    for method in ["r", "c", "n"]:
+        print "%8s %10.3f %10.3f" % (method, 1e6 * costs[method][0],
+                                     1e6 * costs[method][1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [(int(r), int(c), float(d)) for r, c, d in
+                 [arg.split(":") for arg in sys.argv[1:]]]
+    buildbench(sizes)
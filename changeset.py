@@ -0,0 +1,222 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: changeset.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# changeset.py -  Batching modifications of a problem between solves
+#
+# inout3.py changes a bound and the objective between two solves with one
+# call per change. The class ChangeSet records changes of bounds,
+# objective coefficients, right hand sides and matrix coefficients in
+# Python instead. Repeated changes of the same entry are merged, so only
+# the last value is kept, and all changes are made in one call per kind
+# of change when the change set is applied, right before the next solve.
+# The values an entry had before it was first changed are kept, so that
+# all changes applied so far can be undone.
+#
+# Run from the command line
+#
+#    python changeset.py [products [cycles [changes]]]
+#
+# to compare the number of change and solve cycles per second on a
+# generated instance of inout3.py, with one call per change and with a
+# change set.
+
+import cplex
+import inout3
+import random
+import sys
+import time
+
+
+class ChangeSet:
+
+    def __init__(self, prob):
+        self.prob = prob
+        self.lb = {}
+        self.ub = {}
+        self.obj = {}
+        self.rhs = {}
+        self.coef = {}
+        # values before the first change, by kind of change
+        self.baseline = {"lb": {}, "ub": {}, "obj": {}, "rhs": {},
+                         "coef": {}}
+
+    def __len__(self):
+        """Return the number of entries with a pending change."""
+        return len(self.lb) + len(self.ub) + len(self.obj) + \
+               len(self.rhs) + len(self.coef)
+
+    def setlowerbound(self, var, value):
+        self.lb[var] = value
+
+    def setupperbound(self, var, value):
+        self.ub[var] = value
+
+    def setobjective(self, var, value):
+        self.obj[var] = value
+
+    def setrhs(self, row, value):
+        self.rhs[row] = value
+
+    def setcoefficient(self, row, var, value):
+        self.coef[(row, var)] = value
+
+    def merge(self, other):
+        """Add the pending changes of other, which override changes of
+        the same entries in this change set.
+        """
+        self.lb.update(other.lb)
+        self.ub.update(other.ub)
+        self.obj.update(other.obj)
+        self.rhs.update(other.rhs)
+        self.coef.update(other.coef)
+
+    def savebaseline(self, kind, changes, query):
+        """Remember the current values of the entries in changes that
+        were not changed before. query returns the values for a list of
+        entries.
+        """
+        baseline = self.baseline[kind]
+        new = [key for key in changes if key not in baseline]
+        if len(new) > 0:
+            baseline.update(zip(new, query(new)))
+
+    def apply(self):
+        """Make all pending changes in the problem, with one call per
+        kind of change.
+        """
+        prob = self.prob
+        self.savebaseline("lb", self.lb, prob.variables.get_lower_bounds)
+        self.savebaseline("ub", self.ub, prob.variables.get_upper_bounds)
+        self.savebaseline("obj", self.obj, prob.objective.get_linear)
+        self.savebaseline("rhs", self.rhs, prob.linear_constraints.get_rhs)
+        self.savebaseline("coef", self.coef,
+                          prob.linear_constraints.get_coefficients)
+        self.changeall(self.lb, self.ub, self.obj, self.rhs, self.coef)
+        self.lb = {}
+        self.ub = {}
+        self.obj = {}
+        self.rhs = {}
+        self.coef = {}
+
+    def changeall(self, lb, ub, obj, rhs, coef):
+        prob = self.prob
+        if len(lb) > 0:
+            prob.variables.set_lower_bounds(lb.items())
+        if len(ub) > 0:
+            prob.variables.set_upper_bounds(ub.items())
+        if len(obj) > 0:
+            prob.objective.set_linear(obj.items())
+        if len(rhs) > 0:
+            prob.linear_constraints.set_rhs(rhs.items())
+        if len(coef) > 0:
+            prob.linear_constraints.set_coefficients(
+                [(row, var, value) for (row, var), value in coef.items()])
+
+    def solve(self):
+        """Apply all pending changes and solve the problem."""
+        self.apply()
+        self.prob.solve()
+
+    def undo(self):
+        """Drop all pending changes and restore the values all entries
+        had before the first change applied.
+        """
+        baseline = self.baseline
+        self.changeall(baseline["lb"], baseline["ub"], baseline["obj"],
+                       baseline["rhs"], baseline["coef"])
+        self.__init__(self.prob)
+
+
+def randomchanges(rnd, nbProducts, nbResources, changes):
+    """Return a list of random changes of an instance of inout3.py as
+    tuples (kind, key, value).
+    """
+    result = []
+    for k in range(changes):
+        p = rnd.randrange(nbProducts)
+        kind = rnd.choice(["lb", "obj", "rhs", "coef"])
+        if kind == "lb":
+            # minimal inside production
+            result.append(("lb", p, float(rnd.randint(5, 15))))
+        elif kind == "obj":
+            # weight of outside production
+            result.append(("obj", nbProducts + p, rnd.uniform(0.0, 0.01)))
+        elif kind == "rhs":
+            # demand
+            result.append(("rhs", 1 + nbResources + p,
+                           float(rnd.randint(50, 300))))
+        else:
+            # outside cost
+            result.append(("coef", (0, nbProducts + p),
+                           rnd.uniform(0.5, 1.2)))
+    return result
+
+def changebycall(prob, changes):
+    for kind, key, value in changes:
+        if kind == "lb":
+            prob.variables.set_lower_bounds(key, value)
+        elif kind == "obj":
+            prob.objective.set_linear(key, value)
+        elif kind == "rhs":
+            prob.linear_constraints.set_rhs(key, value)
+        else:
+            prob.linear_constraints.set_coefficients(key[0], key[1], value)
+
+def changebyset(changeset, changes):
+    for kind, key, value in changes:
+        if kind == "lb":
+            changeset.setlowerbound(key, value)
+        elif kind == "obj":
+            changeset.setobjective(key, value)
+        elif kind == "rhs":
+            changeset.setrhs(key, value)
+        else:
+            changeset.setcoefficient(key[0], key[1], value)
+
+def changeset(nbProducts, cycles, changes):
+    data = inout3.generate(nbProducts, 2)
+    rnd = random.Random(0)
+    edits = [randomchanges(rnd, nbProducts, 2, changes)
+             for k in range(cycles)]
+    for name in ["calls", "changeset"]:
+        prob = cplex.Cplex()
+        prob.set_log_stream(None)
+        prob.set_results_stream(None)
+        inout3.buildmodel(prob, *data)
+        prob.solve()
+        cs = ChangeSet(prob)
+        start = time.time()
+        for edit in edits:
+            if name == "calls":
+                changebycall(prob, edit)
+                prob.solve()
+            else:
+                changebyset(cs, edit)
+                cs.solve()
+        seconds = time.time() - start
+        print "%-10s %8.3f sec, %10.1f cycles/sec, objective %g" % \
+              (name, seconds, cycles / seconds,
+               prob.solution.get_objective_value())
+
+if __name__ == "__main__":
+    nbProducts = 1000
+    cycles = 100
+    changes = 1000
+    if len(sys.argv) > 1:
+        nbProducts = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        cycles = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        changes = int(sys.argv[3])
+    changeset(nbProducts, cycles, changes)
@@ -26,9 +26,22 @@
 # assumed that only one pattern is laid out across the stock; consequently,
 # only one dimension (the width) of each roll of stock is important.
 #
+# After column generation the integer solution is computed either by
+# solving the cutting optimization problem as a MIP over all generated
+# patterns (the default) or by a residual rounding and diving heuristic.
+# The heuristic rounds down the LP solution, re-prices the residual demand
+# and fixes patterns until all demand is met. Its solution is accepted if
+# its gap to the column generation bound is within a given tolerance;
+# otherwise the MIP is solved, starting from the heuristic solution.
+#
 # To run from the command line, use
 #
-#    python cutstock.py
+#    python cutstock.py [-t tracefile] [datafile [gaptol]]
+#
+# where gaptol is the relative gap up to which the heuristic solution is
+# accepted. If gaptol is not given the MIP is always solved. With -t, no
+# solutions are printed; instead one JSON record per column generation
+# iteration is written to tracefile.
 #
 # To run from within the python interpreter, use
 #
@@ -38,6 +51,8 @@ import cplex
 from cplex.exceptions import CplexSolverError
 from cplex import SparsePair
 from inputdata import read_dat_file
+from math import ceil, floor
+import json
 import sys
 
 RC_EPS = 1.0e-6
@@ -50,11 +65,13 @@ def report1(cut):
     print
     print "Using " + str(cut.solution.get_objective_value()) + " rolls"
     print
-    for v in range(cut.variables.get_num()):
-        print "  Cut" + str(v) + " = " + str(cut.solution.get_values(v))
+    values = cut.solution.get_values()
+    for v in range(len(values)):
+        print "  Cut" + str(v) + " = " + str(values[v])
     print
-    for c in range(cut.linear_constraints.get_num()):
-        print "  Fill" + str(c) + " = " + str(cut.solution.get_dual_values(c))
+    duals = cut.solution.get_dual_values()
+    for c in range(len(duals)):
+        print "  Fill" + str(c) + " = " + str(duals[c])
     print
 
 def report2(pat, use):
@@ -66,8 +83,9 @@ def report2(pat, use):
     print "Reduced cost is " + str(pat.solution.get_objective_value())
     print
     if pat.solution.get_objective_value() <= -RC_EPS:
-        for v in use:
-            print "  Use" + str(v) + " = " + str(pat.solution.get_values(v))
+        values = pat.solution.get_values(use)
+        for v in range(len(use)):
+            print "  Use" + str(use[v]) + " = " + str(values[v])
         print
 
 def report3(cut):
@@ -77,28 +95,43 @@ def report3(cut):
     print
     print "Best integer solution uses " + str(cut.solution.get_objective_value()) + " rolls"
     print
-    for v in range(cut.variables.get_num()):
-        print "  Cut" + str(v) + " = " + str(cut.solution.get_values(v))
+    values = cut.solution.get_values()
+    for v in range(len(values)):
+        print "  Cut" + str(v) + " = " + str(values[v])
 
-
-if __name__ == "__main__":
-    # Input data. If no file is given on the command line then use a
-    # default file name. The data read is
-    # width  - the width of the the roll,
-    # size   - the sie of each strip,
-    # amount - the demand for each strip.
-    datafile = "data/cutstock.dat"
-    if len(sys.argv) < 2:
-        print "Default data file : " + datafile
+def report4(counts, bound):
+    """Print the final report for the solution found by the rounding
+    heuristic. The counts argument gives the number of times each pattern
+    is cut, the bound argument the lower bound from column generation.
+    """
+    rolls = sum(counts)
+    print
+    print "Heuristic solution uses " + str(rolls) + " rolls"
+    if rolls > 0:
+        gap = (rolls - bound) / float(rolls)
     else:
-        datafile = sys.argv[1]
-    width, size, amount = read_dat_file(datafile)
+        gap = 0.0
+    print "Lower bound is " + str(bound) + " rolls, gap = " + str(gap)
+    print
+    for v in range(len(counts)):
+        print "  Cut" + str(v) + " = " + str(counts[v])
 
 
-    # Setup cutting optimization (master) problem.
-    # This is the problem to which columns will be added in the loop
-    # below.
-    cut = cplex.Cplex()
+def setupmaster(width, size, amount, cut = None):
+    """Setup the cutting optimization (master) problem.
+
+    This is the problem to which columns are added during column
+    generation. Returns the problem together with the list of its
+    patterns. Each pattern is a list giving the number of strips of each
+    size that it cuts from one roll. If cut is given, that problem is
+    cleared and reused instead of creating a new one.
+    """
+    if cut is None:
+        cut = cplex.Cplex()
+    else:
+        cut.set_problem_type(cut.problem_type.LP)
+        cut.linear_constraints.delete()
+        cut.variables.delete()
     cutcons = range(len(amount))   # constraint indices
     cutvars = range(len(size))     # variable indices
     cut.variables.add(obj = [1] * len(cutvars))
@@ -107,14 +140,25 @@ if __name__ == "__main__":
     cut.linear_constraints.add(lin_expr = [SparsePair()] * len(cutcons),
                                senses = ["G"] * len(cutcons),
                                rhs = amount)
+    patterns = []
     for v in cutvars:
         cut.linear_constraints.set_coefficients(v, v, int(width / size[v]))
+        patterns.append([0] * len(size))
+        patterns[v][v] = int(width / size[v])
+    return cut, patterns
+
+def setuppattern(width, size, pat = None):
+    """Setup the pattern generation (worker) problem.
 
-    # Setup pattern generation (worker) problem.
-    # The constraints and variables in this problem always stay the same
-    # but the objective function will change during the column generation
-    # loop.
-    pat = cplex.Cplex();
+    The constraints and variables in this problem always stay the same
+    but the objective function changes during column generation. If pat
+    is given, that problem is cleared and reused.
+    """
+    if pat is None:
+        pat = cplex.Cplex()
+    else:
+        pat.linear_constraints.delete()
+        pat.variables.delete()
     use = range(len(size))         # variable indices
     pat.variables.add(types = [pat.variables.type.integer] * len(use))
     # Add a constant 1 to the objective.
@@ -125,28 +169,70 @@ if __name__ == "__main__":
                                senses = ["L"],
                                rhs = [width])
     pat.objective.set_sense(pat.objective.sense.minimize)
+    return pat
 
-    
-    # Column generation procedure
+def writetrace(trace, phase, iteration, cut, pat, added, lptime, pricetime):
+    """Write one record about a column generation iteration to trace.
+
+    Records are written as one JSON object per line with the objective
+    of the cutting optimization problem, the reduced cost found by the
+    pattern generation problem, the number of columns added and the time
+    spent in both problems.
+    """
+    trace.write(json.dumps({"phase": phase,
+                            "iteration": iteration,
+                            "objective": cut.solution.get_objective_value(),
+                            "reducedcost": pat.solution.get_objective_value(),
+                            "columns": cut.variables.get_num(),
+                            "added": added,
+                            "lptime": lptime,
+                            "pricetime": pricetime}) + "\n")
+
+def generatecolumns(cut, pat, patterns, verbose = True, trace = None,
+                    phase = "price"):
+    """Column generation procedure.
+
+    Optimizes the cutting optimization problem cut over its current
+    patterns and adds new patterns found by the pattern generation problem
+    pat until no pattern with negative reduced cost exists. New patterns
+    are appended to the patterns list. Returns the number of iterations.
+
+    If verbose is true, the solutions of both problems are printed in
+    every iteration. If trace is given, a compact record of every
+    iteration, tagged with phase, is written to it instead.
+    """
+    cutcons = range(cut.linear_constraints.get_num())
+    use = range(len(cutcons))
+    iterations = 0
     while True:
-        
+        iterations += 1
+
         # Optimize over current patterns
+        start = cut.get_time()
         cut.solve()
-        report1(cut)
+        lptime = cut.get_time() - start
+        if verbose:
+            report1(cut)
 
         # Find and add new pattern. The objective function of the
         # worker problem is constructed from the dual values of the
         # constraints of the master problem.
         price = map(lambda d: -d, cut.solution.get_dual_values(cutcons))        
         pat.objective.set_linear(zip(use, price))
+        start = pat.get_time()
         pat.solve()
-        report2(pat, use)
+        pricetime = pat.get_time() - start
+        if verbose:
+            report2(pat, use)
 
         # If reduced cost (worker problem objective function value) is
         # non-negative we are optimal. Otherwise we found a new column
         # to be added. Coefficients of the new column are given by the
         # optimal solution vector to the worker problem.
         if pat.solution.get_objective_value() > -RC_EPS:
+            if trace is not None:
+                writetrace(trace, phase, iterations, cut, pat, 0,
+                           lptime, pricetime)
             break
         newpat = pat.solution.get_values(use)
 
@@ -159,12 +245,146 @@ if __name__ == "__main__":
         cut.linear_constraints.set_coefficients(zip(cutcons,
                                                     [idx] * len(use),
                                                     newpat))
-        cutvars.append(idx)
+        patterns.append([int(round(a)) for a in newpat])
+        if trace is not None:
+            writetrace(trace, phase, iterations, cut, pat, 1,
+                       lptime, pricetime)
+    return iterations
 
-    # Perform a final solve on the cutting optimization problem.
-    # Turn all variables into integers before doing that.
+def roundanddive(cut, pat, patterns, amount, verbose = True, trace = None):
+    """Residual rounding and diving heuristic.
+
+    Rounds down the optimal LP solution of the cutting optimization problem
+    cut and covers the remaining demand by diving: the LP is re-solved on
+    the residual demand, with fresh pricing by the pattern generation
+    problem pat, and the rounded down solution is fixed. If that fixes
+    nothing, one roll of the most used pattern is fixed instead. On return
+    the right-hand sides of cut are reset to amount.
+
+    Returns a list giving the number of times each pattern is cut and
+    the number of column generation iterations spent diving.
+    """
+    cutcons = range(len(amount))
+    iterations = 0
+    counts = [0] * len(patterns)
+    residual = list(amount)
+    x = cut.solution.get_values()
+    fixed = [int(floor(v + RC_EPS)) for v in x]
+    while True:
+        for p in range(len(fixed)):
+            if fixed[p] > 0:
+                counts[p] += fixed[p]
+                for c in cutcons:
+                    residual[c] = max(0, residual[c] - fixed[p] * patterns[p][c])
+        if max(residual) <= 0:
+            break
+
+        cut.linear_constraints.set_rhs(zip(cutcons, residual))
+        iterations += generatecolumns(cut, pat, patterns, verbose, trace,
+                                      "dive")
+        counts.extend([0] * (len(patterns) - len(counts)))
+        x = cut.solution.get_values()
+        fixed = [int(floor(v + RC_EPS)) for v in x]
+        if sum(fixed) == 0:
+            fixed[max(range(len(x)), key = lambda p: x[p])] = 1
+    cut.linear_constraints.set_rhs(zip(cutcons, amount))
+    return counts, iterations
+
+def solvemip(cut, start = None):
+    """Perform a final solve on the cutting optimization problem.
+
+    Turns all variables into integers before doing that. If start is
+    given, it is installed as a MIP start.
+    """
+    cutvars = range(cut.variables.get_num())
     cut.variables.set_types(zip(cutvars,
                                 [cut.variables.type.integer] * len(cutvars)))
+    if start is not None:
+        cut.MIP_starts.add(SparsePair(ind = cutvars, val = start),
+                           cut.MIP_starts.effort_level.check_feasibility)
     cut.solve()
-    report3(cut)
-    print "Solution status = ", cut.solution.get_status()
+
+def cutstock(width, size, amount, gaptol = None, verbose = True,
+             cut = None, pat = None, trace = None):
+    """Solve the cutting stock problem given by the roll width, the size
+    of each strip and the demand amount for each strip.
+
+    If gaptol is None the final integer solution is computed by solving a
+    MIP over all generated patterns. Otherwise the rounding heuristic is
+    run first and its solution is returned if its relative gap to the
+    column generation bound does not exceed gaptol. The cut and pat
+    arguments optionally give problems to reuse for the master and the
+    pattern generation problem.
+
+    If verbose is false, neither the solutions nor the CPLEX logs are
+    printed. If trace is given, per-iteration records are written to it
+    as described for writetrace().
+
+    Returns a tuple (counts, patterns, bound, iterations) where counts[p]
+    is the number of times pattern patterns[p] is cut, bound is a lower
+    bound on the number of rolls and iterations is the number of column
+    generation iterations.
+    """
+    cut, patterns = setupmaster(width, size, amount, cut)
+    pat = setuppattern(width, size, pat)
+    if not verbose:
+        for prob in (cut, pat):
+            prob.set_log_stream(None)
+            prob.set_results_stream(None)
+    iterations = generatecolumns(cut, pat, patterns, verbose, trace)
+    bound = int(ceil(cut.solution.get_objective_value() - RC_EPS))
+
+    start = None
+    if gaptol is not None:
+        counts, diving = roundanddive(cut, pat, patterns, amount, verbose,
+                                      trace)
+        iterations += diving
+        if verbose:
+            report4(counts, bound)
+        if sum(counts) - bound <= gaptol * sum(counts):
+            return counts, patterns, bound, iterations
+        start = counts
+
+    solvemip(cut, start)
+    if verbose:
+        report3(cut)
+        print "Solution status = ", cut.solution.get_status()
+    counts = [int(round(v)) for v in cut.solution.get_values()]
+    bound = max(bound,
+                int(ceil(cut.solution.MIP.get_best_objective() - RC_EPS)))
+    return counts, patterns, bound, iterations
+
+
+if __name__ == "__main__":
+    # Input data. If no file is given on the command line then use a
+    # default file name. The data read is
+    # width  - the width of the the roll,
+    # size   - the sie of each strip,
+    # amount - the demand for each strip.
+    # An optional second argument gives the gap tolerance for the
+    # rounding heuristic. With -t tracefile the iterations are traced to
+    # tracefile instead of printing the solutions.
+    datafile = "data/cutstock.dat"
+    gaptol = None
+    trace = None
+    args = sys.argv[1:]
+    if len(args) > 0 and args[0] == "-t":
+        if len(args) < 2:
+            print "Usage: cutstock.py [-t tracefile] [datafile [gaptol]]"
+            sys.exit(-1)
+        trace = open(args[1], "w")
+        args = args[2:]
+    if len(args) < 1:
+        print "Default data file : " + datafile
+    else:
+        datafile = args[0]
+    if len(args) > 1:
+        gaptol = float(args[1])
+    width, size, amount = read_dat_file(datafile)
+
+    counts, patterns, bound, iterations = cutstock(width, size, amount, gaptol,
+                                                   trace is None, trace = trace)
+    if trace is not None:
+        trace.close()
+        print "Solution uses " + str(sum(counts)) + " rolls, bound is " + \
+              str(bound) + ", " + str(iterations) + " iterations"
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: cutstockbatch.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# cutstockbatch.py -- solving many cutting stock instances in parallel
+#
+# The function solvebatch() takes a list of cutting stock instances, each
+# given as a tuple (width, size, amount) as read by cutstock.py, and
+# solves them with the column generation procedure of cutstock.py in a
+# pool of worker processes. Every worker creates its master and pattern
+# generation problems once and reuses them for all instances it solves.
+# Results are returned as soon as each instance is solved, together with
+# the time and the number of column generation iterations it took.
+#
+# To run from the command line, use
+#
+#    python cutstockbatch.py [datafile [processes]]
+#
+# This solves the instance in datafile for a range of roll widths.
+#
+# To run from within the python interpreter, use
+#
+# >>> import cutstockbatch
+
+import cplex
+from cutstock import cutstock
+from inputdata import read_dat_file
+from multiprocessing import Pool
+import sys
+import time
+
+# Problems reused by all instances solved in a worker process.
+workercut = None
+workerpat = None
+
+def initworker():
+    """Create the problems reused by a worker process."""
+    global workercut, workerpat
+    workercut = cplex.Cplex()
+    workerpat = cplex.Cplex()
+    for prob in (workercut, workerpat):
+        prob.set_log_stream(None)
+        prob.set_results_stream(None)
+
+def solveinstance(task):
+    """Solve one instance in a worker process.
+
+    The task argument is a tuple (key, instance, gaptol). Returns a tuple
+    (key, counts, patterns, bound, iterations, seconds).
+    """
+    key, instance, gaptol = task
+    width, size, amount = instance
+    start = time.time()
+    counts, patterns, bound, iterations = cutstock(width, size, amount,
+                                                   gaptol, False,
+                                                   workercut, workerpat)
+    return key, counts, patterns, bound, iterations, time.time() - start
+
+def solvebatch(instances, gaptol = None, processes = None):
+    """Solve a list of cutting stock instances in parallel.
+
+    Each instance is a tuple (width, size, amount). The gaptol argument is
+    passed on to cutstock.cutstock(). The number of worker processes
+    defaults to the number of CPUs.
+
+    This is a generator that yields a tuple
+    (key, counts, patterns, bound, iterations, seconds) for each instance
+    as soon as it is solved, where key is the position of the instance in
+    the instances list.
+    """
+    pool = Pool(processes, initworker)
+    try:
+        tasks = [(key, instances[key], gaptol) for key in range(len(instances))]
+        for result in pool.imap_unordered(solveinstance, tasks):
+            yield result
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    datafile = "data/cutstock.dat"
+    processes = None
+    if len(sys.argv) < 2:
+        print "Default data file : " + datafile
+    else:
+        datafile = sys.argv[1]
+    if len(sys.argv) > 2:
+        processes = int(sys.argv[2])
+    width, size, amount = read_dat_file(datafile)
+
+    instances = [(w, size, amount) for w in range(width, 2 * width + 1, 5)]
+    start = time.time()
+    for key, counts, patterns, bound, iterations, seconds in \
+            solvebatch(instances, processes = processes):
+        print "Width %4d: %4d rolls, bound %4d, %3d iterations, %.3f sec" \
+              % (instances[key][0], sum(counts), bound, iterations, seconds)
+    print "Solved %d instances in %.3f sec" % (len(instances),
+                                               time.time() - start)
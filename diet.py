@@ -26,6 +26,7 @@
 # To run from within the python interpreter, use
 #
 # >>> import diet
+# >>> diet.diet("r")
 
 import cplex
 from cplex.exceptions import CplexError
@@ -39,7 +40,7 @@ class ProbData:
         # read the data in diet.dat
         self.foodCost, self.foodMin, self.foodMax, self.nutrMin, \
                        self.nutrMax, self.nutrPer = \
-                       read_dat_file("../../data/diet.dat")
+                       read_dat_file(filename)
 
         # check data consistency
         if len(self.foodCost) != len(self.foodMin) or \
@@ -149,11 +150,4 @@ if __name__ == "__main__":
         print " Exiting..."
         sys.exit(-1)
     diet(sys.argv[1][1])
-else:
-    prompt = """Enter the letter indicating how the problem data should be populated:
-    r : populate by rows
-    c : populate by columns\n ? > """
-    r = 'r'
-    c = 'c'
-    diet(input(prompt))
 
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: dietparam.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# dietparam.py -- parametric analysis of the diet problem
+#
+# The diet problem of diet.py is built and solved once. The minimum of a
+# nutrient, or the cost of a food, is then moved along a grid of values.
+# After each change the problem is solved again starting from the optimal
+# basis of the previous value: with the dual simplex method after a change
+# of a right hand side, which leaves the basis dual feasible, and with the
+# primal simplex method after a change of a cost, which leaves the basis
+# primal feasible.
+#
+# For every grid value the objective value, the solution and the number
+# of simplex iterations are collected. The grid values at which the
+# optimal basis changes are the breakpoints of the piecewise linear
+# objective function; for each of them the interval over which CPLEX
+# ranging reports the previous basis to stay optimal is given as well.
+#
+# To run from the command line, use
+#
+#    python dietparam.py [-c] index from to steps [datafile]
+#
+# This moves the minimum of nutrient index, or with -c the cost of food
+# index, from the value from to the value to in steps steps, and compares
+# the time against solving a newly built problem for each value.
+
+import cplex
+from diet import ProbData, populatebyrow
+import sys
+import time
+
+def parametric(prob, values, change, method, sensitivity):
+    """Solve prob for each value in values, starting from the basis of
+    the previous value.
+
+    change(prob, value) applies a value to prob and method is the
+    simplex method used. sensitivity(prob) returns the interval over which
+    the current basis stays optimal.
+
+    Returns (objectives, solutions, iterations, breakpoints). The first
+    three list, per value, the objective value, the values of all
+    variables and the number of simplex iterations; objective value and
+    solution are None if there is no optimal solution. breakpoints lists
+    tuples (k, interval) for each value values[k] at which the optimal
+    basis changed, where interval is the sensitivity range of the basis
+    of the previous value.
+    """
+    prob.parameters.lpmethod.set(method)
+    objectives = []
+    solutions = []
+    iterations = []
+    breakpoints = []
+    basis = None
+    interval = None
+    for k in range(len(values)):
+        change(prob, values[k])
+        prob.solve()
+        iterations.append(prob.solution.progress.get_num_iterations())
+        if prob.solution.get_status() != prob.solution.status.optimal:
+            objectives.append(None)
+            solutions.append(None)
+            if basis is not None:
+                breakpoints.append((k, interval))
+            basis = None
+            continue
+        objectives.append(prob.solution.get_objective_value())
+        solutions.append(prob.solution.get_values())
+        current = prob.solution.basis.get_basis()
+        if basis is not None and current != basis:
+            breakpoints.append((k, interval))
+        basis = current
+        interval = sensitivity(prob)
+    return objectives, solutions, iterations, breakpoints
+
+def nutrientgrid(prob, nutrient, values):
+    """Move the minimum of the ranged row nutrient over values, keeping
+    its maximum. Returns the result of parametric().
+    """
+    upper = prob.linear_constraints.get_rhs(nutrient) + \
+            prob.linear_constraints.get_range_values(nutrient)
+
+    def change(prob, value):
+        prob.linear_constraints.set_rhs(nutrient, value)
+        prob.linear_constraints.set_range_values(nutrient, upper - value)
+
+    def sensitivity(prob):
+        return prob.solution.sensitivity.rhs(nutrient)
+
+    return parametric(prob, values, change,
+                      prob.parameters.lpmethod.values.dual, sensitivity)
+
+def costgrid(prob, food, values):
+    """Move the cost of food over values. Returns the result of
+    parametric().
+    """
+    def change(prob, value):
+        prob.objective.set_linear(food, value)
+
+    def sensitivity(prob):
+        return prob.solution.sensitivity.objective(food)
+
+    return parametric(prob, values, change,
+                      prob.parameters.lpmethod.values.primal, sensitivity)
+
+def coldgrid(data, index, values, cost):
+    """Build and solve a new problem for each value, as diet.py does.
+    Returns the list of objective values.
+    """
+    objectives = []
+    for value in values:
+        prob = cplex.Cplex()
+        prob.set_log_stream(None)
+        prob.set_results_stream(None)
+        populatebyrow(prob, data)
+        if cost:
+            prob.objective.set_linear(index, value)
+        else:
+            upper = data.nutrMax[index]
+            prob.linear_constraints.set_rhs(index, value)
+            prob.linear_constraints.set_range_values(index, upper - value)
+        prob.solve()
+        if prob.solution.get_status() == prob.solution.status.optimal:
+            objectives.append(prob.solution.get_objective_value())
+        else:
+            objectives.append(None)
+    return objectives
+
+def dietparam(datafile, index, values, cost):
+    data = ProbData(datafile)
+
+    start = time.time()
+    prob = cplex.Cplex()
+    prob.set_log_stream(None)
+    prob.set_results_stream(None)
+    populatebyrow(prob, data)
+    prob.solve()
+    if cost:
+        result = costgrid(prob, index, values)
+    else:
+        result = nutrientgrid(prob, index, values)
+    warmtime = time.time() - start
+    objectives, solutions, iterations, breakpoints = result
+
+    start = time.time()
+    coldobjectives = coldgrid(data, index, values, cost)
+    coldtime = time.time() - start
+
+    print "%14s %14s %10s %14s" % ("value", "objective", "iterations",
+                                   "cold")
+    for k in range(len(values)):
+        print "%14g %14s %10d %14s" % (values[k], objectives[k],
+                                       iterations[k], coldobjectives[k])
+    for k, interval in breakpoints:
+        print "Basis changes at %g (previous basis optimal on %s)" % \
+              (values[k], interval)
+    print "Warm started: %.3f sec, rebuilt: %.3f sec" % (warmtime, coldtime)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    cost = False
+    if len(args) > 0 and args[0] == "-c":
+        cost = True
+        args = args[1:]
+    if len(args) < 4:
+        print "Usage: dietparam.py [-c] index from to steps [datafile]"
+        sys.exit(-1)
+    index = int(args[0])
+    lo, hi, steps = float(args[1]), float(args[2]), int(args[3])
+    datafile = "data/diet.dat"
+    if len(args) > 4:
+        datafile = args[4]
+    values = [lo + (hi - lo) * k / max(1, steps - 1) for k in range(steps)]
+    dietparam(datafile, index, values, cost)
@@ -14,6 +14,9 @@
 # etsp.py -  Model an earliness-tardiness scheduling problem 
 #            with indicator constraints
 #
+# Before solving, a schedule computed with the apparent tardiness cost
+# dispatching rule is installed as a MIP start.
+#
 # The user may choose the data file on the command line:
 #
 #    python etsp.py  ../../data/etsp.dat  
@@ -22,165 +25,287 @@
 # Alternatively, this example can be run from the python interpreter by
 # 
 # >>> import etsp 
+# >>> etsp.etsp("../../data/etsp.dat")
 #
-# The user will be prompted to chose the data file.
+# Importing the module does not build or solve anything, so that
+# buildmodel() and generate() can be used on their own; see etspbench.py.
 
 import cplex
+from cplex.callbacks import MIPInfoCallback
 from cplex.exceptions import CplexError
 from inputdata import read_dat_file
+from math import exp
+import random
 import sys
 
-def etsp(filename):
-   try:      
-      # Build model
-      model = cplex.Cplex();
-      model.objective.set_sense(model.objective.sense.minimize)
+def buildmodel(model, activityOnAResource, duration, jobDueDate,
+               jobEarlinessCost, jobTardinessCost):
+   """Populate model with the earliness-tardiness scheduling problem.
 
-      # Add activity start time variables
-      nbStart = nbJob * nbResource
-      obj = [0.0] * nbStart 
-      lb  = [0.0] * nbStart
-      ub  = [10000.0] * nbStart
-      model.variables.add(obj, lb, ub)    
+   All variables of a kind and all linear constraints are added in one
+   call each. The indicator constraints are prepared as arrays first and
+   added in one call where the API provides add_batch, and in a tight
+   loop otherwise. Returns the number of indicator constraints.
+   """
+   nbJob = len(jobDueDate)
+   nbResource = len(activityOnAResource)
 
-      # State precedence constraints
-      # starttime(i, j) - starttime(i, j-1) >= duration(i, j-1)
-      for i in range(nbJob):
-         for j in range(1, nbResource):
-            ind = [starttime(i, j), starttime(i, j-1)]
-            val = [1.0, -1.0]
-            row = [[ind, val]]
-            model.linear_constraints.add(lin_expr = row, senses = "G", rhs =
-                  [duration[i][j-1]])
-
-      # Add indicator variables
-      nIndicatorVars = nbResource * nbJob * (nbJob - 1)
-      colname_ind = ["ind"+str(j+1) for j in range(nIndicatorVars)]
-      obj = [0.0] * nIndicatorVars
-      lb  = [0.0] * nIndicatorVars
-      ub  = [1.0] * nIndicatorVars
-      types = ["B"] * nIndicatorVars
-      model.variables.add(obj, lb, ub, types, colname_ind)
-
-      # Add ind1 + ind2 >= 1
-      #     ind3 + ind4 >= 1
-      #     ind5 + ind6 >= 1
-      #     ...
-      # constraints
-      j = nbStart 
-      for i in range(nIndicatorVars / 2):
-         ind = [j, j+1]
-         val = [1.0, 1.0]
-         row = [[ind, val]]
-         model.linear_constraints.add(lin_expr = row, senses = "G", rhs = [1])
-         j = j + 2
-
-      # Add indicator constraints
-      # i1 = 1 <-> c1
-      # i2 = 1 <-> c2
-      index = 0
-      for i in range(nbResource):
-         e = nbJob - 1
-         for j in range(e):
-            activity1 = activityOnAResource[i][j]
-            for k in range(j+1, nbJob):
-               activity2 = activityOnAResource[i][k]
-
-               ic_dict = {}
-               ic_dict["indvar"] = nbStart + index
-               ic_dict["lin_expr"] = cplex.SparsePair(
-                     ind = [starttime(j,activity1), starttime(k, activity2)], 
-                     val = [1.0,-1.0])
-               ic_dict["rhs"] = duration[k][activity2]/1.0
-               ic_dict["sense"] = "G"
-               ic_dict["complemented"] = 0
-               # ind(nbStart + index) = 1 -> ...
-               # starttime(j, activity1) - starttime(k, activity2) >=
-               # duration(k, activity2)
-               model.indicator_constraints.add(**ic_dict)
-
-               ic_dict["sense"] = "L"
-               ic_dict["complemented"] = 1
-               # ind(nbStart + index) = 0 -> ...
-               # starttime(j, activity1) - starttime(k, activity2) <=
-               # duration(k, activity2)
-               model.indicator_constraints.add(**ic_dict)
-
-               ic_dict = {}
-               ic_dict["indvar"] = nbStart + index + 1
-               ic_dict["lin_expr"] = cplex.SparsePair(ind =[starttime(k,
-                  activity2), starttime(j, activity1)], val = [1.0, -1.0])
-               ic_dict["rhs"] = duration[j][activity1]/1.0
-               ic_dict["sense"] = "G"
-               ic_dict["complemented"] = 0
-               # ind(nbStart + index) = 1 -> ...
-               # starttime(k, activity2) - starttime(j, activity1) >=
-               # duration(j, activity1)
-               model.indicator_constraints.add(**ic_dict)
-
-               ic_dict["sense"] = "L"
-               ic_dict["complemented"] = 1
-               # ind(nbStart + index) = 0 -> ...
-               # starttime(k, activity2) - starttime(j, activity1) <=
-               # duration(j, activity1)
-               model.indicator_constraints.add(**ic_dict)
-
-               index = index + 2
-
-      # Add Objective function
-      # each job has a cost which contains jobEarlinessCost and
-      # jobTardinessCost, and get the index of Earliness variables,
-      # Tardiness variables and Endness variables
-      indexOfEarlinessVar = \
-            range(model.variables.get_num(), model.variables.get_num() + nbJob)
-      model.variables.add(obj = jobEarlinessCost)
-
-      indexOfTardinessVar = \
-            range(model.variables.get_num(), model.variables.get_num() + nbJob)
-      model.variables.add(obj = jobTardinessCost)
-
-      # Add finished time variables
-      indexOfEndnessVar = range(model.variables.get_num(),\
-            model.variables.get_num() + nbJob)
-      model.variables.add(obj = [0.0] * nbJob)
-
-      # Add constraints for each Job
-      # indexOfEndnessVar[i] - starttime(i, nbResource) = duration[i][nbResource]
-      for i in range(nbJob):
-         ind = [indexOfEndnessVar[i], starttime(i, nbResource - 1)]
-         val = [1.0, -1.0]
-         row = [[ind, val]]
-         model.linear_constraints.add(lin_expr = row, senses = "E", rhs =
-               [duration[i][nbResource - 1]])
-
-      # Add constraints for each Job
-      # jobDueDate[i] = \
-      # indexOfEndnessVar[i] + indexOfEarlinessVar[i] - indexOfTardinessVar[i]
+   def starttime(job, res):
+      return job * nbResource + res
+
+   model.objective.set_sense(model.objective.sense.minimize)
+
+   # Add activity start time variables. Starting later than the latest
+   # due date plus the total duration of all activities never pays off.
+   nbStart = nbJob * nbResource
+   horizon = sum(sum(d) for d in duration) + max(jobDueDate)
+   model.variables.add(obj = [0.0] * nbStart, lb = [0.0] * nbStart,
+                       ub = [float(horizon)] * nbStart)
+
+   # Add indicator variables
+   nIndicatorVars = nbResource * nbJob * (nbJob - 1)
+   model.variables.add(obj = [0.0] * nIndicatorVars,
+                       lb = [0.0] * nIndicatorVars,
+                       ub = [1.0] * nIndicatorVars,
+                       types = ["B"] * nIndicatorVars,
+                       names = ["ind"+str(j+1) for j in range(nIndicatorVars)])
+
+   # Add earliness, tardiness and finished time variables. Each job has a
+   # cost which contains jobEarlinessCost and jobTardinessCost.
+   indexOfEarlinessVar = range(nbStart + nIndicatorVars,
+                               nbStart + nIndicatorVars + nbJob)
+   indexOfTardinessVar = range(indexOfEarlinessVar[-1] + 1,
+                               indexOfEarlinessVar[-1] + 1 + nbJob)
+   indexOfEndnessVar = range(indexOfTardinessVar[-1] + 1,
+                             indexOfTardinessVar[-1] + 1 + nbJob)
+   model.variables.add(obj = jobEarlinessCost + jobTardinessCost +
+                             [0.0] * nbJob)
+
+   rows = []
+   senses = []
+   rhs = []
+
+   # State precedence constraints
+   # starttime(i, j) - starttime(i, j-1) >= duration(i, j-1)
+   for i in range(nbJob):
+      for j in range(1, nbResource):
+         rows.append([[starttime(i, j), starttime(i, j-1)], [1.0, -1.0]])
+         senses.append("G")
+         rhs.append(duration[i][j-1])
+
+   # Add ind1 + ind2 >= 1
+   #     ind3 + ind4 >= 1
+   #     ind5 + ind6 >= 1
+   #     ...
+   # constraints
+   for j in range(nbStart, nbStart + nIndicatorVars, 2):
+      rows.append([[j, j+1], [1.0, 1.0]])
+      senses.append("G")
+      rhs.append(1.0)
+
+   # Add constraints for each Job
+   # indexOfEndnessVar[i] - starttime(i, nbResource) = duration[i][nbResource]
+   for i in range(nbJob):
+      rows.append([[indexOfEndnessVar[i], starttime(i, nbResource - 1)],
+                   [1.0, -1.0]])
+      senses.append("E")
+      rhs.append(duration[i][nbResource - 1])
+
+   # Add constraints for each Job
+   # jobDueDate[i] = \
+   # indexOfEndnessVar[i] + indexOfEarlinessVar[i] - indexOfTardinessVar[i]
+   for i in range(nbJob):
+      rows.append([[indexOfEndnessVar[i], indexOfEarlinessVar[i],
+                    indexOfTardinessVar[i]], [1.0, 1.0, -1.0]])
+      senses.append("E")
+      rhs.append(jobDueDate[i])
+
+   model.linear_constraints.add(lin_expr = rows, senses = senses, rhs = rhs)
+
+   # Add indicator constraints
+   # i1 = 1 <-> c1
+   # i2 = 1 <-> c2
+   # For each pair of jobs j, k on resource i:
+   # ind(index) = 1 -> starttime(j, activity1) - starttime(k, activity2) >=
+   #                   duration(k, activity2)
+   # ind(index) = 0 -> starttime(j, activity1) - starttime(k, activity2) <=
+   #                   duration(k, activity2)
+   # ind(index+1) = 1 -> starttime(k, activity2) - starttime(j, activity1) >=
+   #                     duration(j, activity1)
+   # ind(index+1) = 0 -> starttime(k, activity2) - starttime(j, activity1) <=
+   #                     duration(j, activity1)
+   ic_expr = []
+   ic_sense = []
+   ic_rhs = []
+   ic_indvar = []
+   ic_complemented = []
+   index = nbStart
+   for i in range(nbResource):
+      for j in range(nbJob - 1):
+         activity1 = activityOnAResource[i][j]
+         for k in range(j+1, nbJob):
+            activity2 = activityOnAResource[i][k]
+            jk = cplex.SparsePair(ind = [starttime(j, activity1),
+                                         starttime(k, activity2)],
+                                  val = [1.0, -1.0])
+            kj = cplex.SparsePair(ind = [starttime(k, activity2),
+                                         starttime(j, activity1)],
+                                  val = [1.0, -1.0])
+            ic_expr.extend([jk, jk, kj, kj])
+            ic_sense.extend(["G", "L", "G", "L"])
+            ic_rhs.extend([duration[k][activity2] / 1.0] * 2 +
+                          [duration[j][activity1] / 1.0] * 2)
+            ic_indvar.extend([index, index, index + 1, index + 1])
+            ic_complemented.extend([0, 1, 0, 1])
+            index = index + 2
+
+   indicators = model.indicator_constraints
+   if hasattr(indicators, "add_batch"):
+      indicators.add_batch(lin_expr = ic_expr, sense = ic_sense,
+                           rhs = ic_rhs, indvar = ic_indvar,
+                           complemented = ic_complemented)
+   else:
+      add = indicators.add
+      for c in range(len(ic_expr)):
+         add(ic_expr[c], ic_sense[c], ic_rhs[c], ic_indvar[c],
+             ic_complemented[c])
+
+   return len(ic_expr)
+
+class FirstIncumbentCallback(MIPInfoCallback):
+
+   # Records the time at which the first incumbent is available.
+   def __call__(self):
+      if self.firsttime is None and self.has_incumbent():
+         self.firsttime = self.get_time() - self.starttime
+
+def dispatch(activityOnAResource, duration, jobDueDate, jobTardinessCost,
+             rule = "atc"):
+   """Compute a schedule with a dispatching rule.
+
+   Activities are scheduled one at a time (Giffler-Thompson): among the
+   next activities of all jobs, the one that can finish first determines
+   a resource, and among the activities that could start on that
+   resource before then, the rule picks one. With rule "edd" the job with
+   the earliest due date is picked, with rule "atc" the job with the
+   largest apparent tardiness cost index.
+
+   Returns the list of start times, indexed like the start time
+   variables of buildmodel().
+   """
+   nbJob = len(jobDueDate)
+   nbResource = len(activityOnAResource)
+
+   # resource[i][a] is the resource used by activity a of job i
+   resource = [[0] * nbResource for i in range(nbJob)]
+   for r in range(nbResource):
       for i in range(nbJob):
-         ind = [indexOfEndnessVar[i],
-                indexOfEarlinessVar[i],
-                indexOfTardinessVar[i]]
-         val = [1.0, 1.0, -1.0]
-         row = [[ind, val]]
-         model.linear_constraints.add(lin_expr = row, senses = "E", rhs =
-               [jobDueDate[i]])
-
-      model.parameters.emphasis.mip = 4
-      model.solve()
-      model.write('etsp.sav')
-   except CplexError, exc:
-      print exc
-      return
+         resource[i][activityOnAResource[r][i]] = r
 
-# Display solution
-   print "Solution status = ", model.solution.get_status()
-   print "Optimal Value =  ", model.solution.get_objective_value()
+   remaining = [sum(duration[i]) for i in range(nbJob)]
+   meanduration = sum(remaining) / float(nbJob * nbResource)
+   nextactivity = [0] * nbJob
+   jobready = [0.0] * nbJob
+   resourceready = [0.0] * nbResource
+   start = [0.0] * (nbJob * nbResource)
 
-defaultfile = "../../../examples/data/etsp.dat"
-   
-if __name__ == "__main__":
-   # Read in data file. If no file name is given on the command line
-   # we use a default file name. The data we read is
+   pending = range(nbJob)
+   while pending:
+      earliest = dict((i, max(jobready[i],
+                              resourceready[resource[i][nextactivity[i]]]))
+                      for i in pending)
+      first = min(pending, key = lambda i: earliest[i] +
+                                           duration[i][nextactivity[i]])
+      finish = earliest[first] + duration[first][nextactivity[first]]
+      r = resource[first][nextactivity[first]]
+      # first itself is a candidate even if its activity has zero
+      # duration and so does not start before finish.
+      candidates = [i for i in pending
+                    if i == first or
+                       (resource[i][nextactivity[i]] == r and
+                        earliest[i] < finish)]
+      if rule == "edd":
+         i = min(candidates, key = lambda i: jobDueDate[i])
+      else:
+         t = resourceready[r]
+         def atc(i):
+            p = max(duration[i][nextactivity[i]], 1e-6)
+            slack = max(jobDueDate[i] - remaining[i] - t, 0.0)
+            return jobTardinessCost[i] / p * exp(-slack / (2.0 * meanduration))
+         i = max(candidates, key = atc)
+
+      a = nextactivity[i]
+      start[i * nbResource + a] = earliest[i]
+      jobready[i] = resourceready[r] = earliest[i] + duration[i][a]
+      remaining[i] -= duration[i][a]
+      nextactivity[i] += 1
+      if nextactivity[i] == nbResource:
+         pending.remove(i)
+   return start
+
+def startvalues(activityOnAResource, duration, jobDueDate, start):
+   """Return values for all variables of buildmodel() that are
+   consistent with the schedule given by start.
+   """
+   nbJob = len(jobDueDate)
+   nbResource = len(activityOnAResource)
+
+   indicators = []
+   for i in range(nbResource):
+      for j in range(nbJob - 1):
+         sj = start[j * nbResource + activityOnAResource[i][j]]
+         for k in range(j+1, nbJob):
+            sk = start[k * nbResource + activityOnAResource[i][k]]
+            # The first indicator states that j runs after k, the
+            # second that k runs after j.
+            if sj >= sk:
+               indicators.extend([1.0, 0.0])
+            else:
+               indicators.extend([0.0, 1.0])
+
+   end = [start[i * nbResource + nbResource - 1] +
+          duration[i][nbResource - 1] for i in range(nbJob)]
+   earliness = [max(jobDueDate[i] - end[i], 0.0) for i in range(nbJob)]
+   tardiness = [max(end[i] - jobDueDate[i], 0.0) for i in range(nbJob)]
+   return start + indicators + earliness + tardiness + end
+
+def addstart(model, activityOnAResource, duration, jobDueDate,
+             jobEarlinessCost, jobTardinessCost):
+   """Install a schedule computed by a dispatching rule as MIP start."""
+   start = dispatch(activityOnAResource, duration, jobDueDate,
+                    jobTardinessCost)
+   values = startvalues(activityOnAResource, duration, jobDueDate, start)
+   model.MIP_starts.add(cplex.SparsePair(ind = range(len(values)),
+                                         val = values),
+                        model.MIP_starts.effort_level.check_feasibility)
+
+def generate(nbJob, nbResource, seed = 0):
+   """Return data for a random instance with nbJob jobs on nbResource
+   resources, in the order in which it is read from a data file.
+
+   Every job visits the resources in a random order. Due dates lie
+   between the total duration of the job and that plus the average load
+   of a resource.
+   """
+   rnd = random.Random(seed)
+   activityOnAResource = [[0] * nbJob for r in range(nbResource)]
+   duration = []
+   for i in range(nbJob):
+      order = range(nbResource)
+      rnd.shuffle(order)
+      for a in range(nbResource):
+         activityOnAResource[order[a]][i] = a
+      duration.append([rnd.randint(1, 99) for a in range(nbResource)])
+   load = sum(sum(d) for d in duration) // nbResource
+   jobDueDate = [rnd.randint(sum(duration[i]), sum(duration[i]) + load)
+                 for i in range(nbJob)]
+   jobEarlinessCost = [rnd.randint(1, 20) for i in range(nbJob)]
+   jobTardinessCost = [rnd.randint(1, 20) for i in range(nbJob)]
+   return activityOnAResource, duration, jobDueDate, \
+          jobEarlinessCost, jobTardinessCost
+
+def etsp(filename, savefile = "etsp.sav"):
+   # Read in data file. The data we read is
    # activityOnAResource -- 
    #                     An array of arrays represents the resources 
    #                     required for each activity of a job
@@ -193,7 +318,41 @@ if __name__ == "__main__":
    #                  contains the penalty for being too early for each job;
    # jobTardinessCost -- 
    #                  contains the penalty for being too late for each job.
+   data = read_dat_file(filename)
+   try:      
+      # Build model
+      model = cplex.Cplex();
+      start = model.get_time()
+      nIndicators = buildmodel(model, *data)
+      print "Built model for %d jobs with %d indicator constraints " \
+            "in %.3f sec" % (len(data[2]), nIndicators,
+                             model.get_time() - start)
 
+      addstart(model, *data)
+
+      incumbent_cb = model.register_callback(FirstIncumbentCallback)
+      incumbent_cb.firsttime = None
+      incumbent_cb.starttime = model.get_time()
+
+      model.parameters.emphasis.mip.set(4)
+      model.solve()
+      if savefile:
+         model.write(savefile)
+   except CplexError, exc:
+      print exc
+      return
+
+# Display solution
+   print "Solution status = ", model.solution.get_status()
+   print "Optimal Value =  ", model.solution.get_objective_value()
+   print "First incumbent after %s sec, final gap = %g" % \
+         (incumbent_cb.firsttime, model.solution.MIP.get_mip_relative_gap())
+
+defaultfile = "../../../examples/data/etsp.dat"
+   
+if __name__ == "__main__":
+   # If no file name is given on the command line we use a default file
+   # name.
    datafile = defaultfile
    
    if len(sys.argv) < 2:
@@ -201,29 +360,4 @@ if __name__ == "__main__":
    else:
       datafile = sys.argv[1]
 
-else:
-    prompt = """Enter the path to a data file:
-The path must be entered as a string; e.g.
-"../../../examples/data/etsp.dat".
-Enter "" to use the default file.\n"""
-    user_file = input(prompt)
-    print "hello" + user_file
-    if user_file != "":
-       datafile = user_file
-    else:
-       datafile = defaultfile
-
-activityOnAResource, \
-duration, \
-jobDueDate, \
-jobEarlinessCost, \
-jobTardinessCost = \
-read_dat_file(datafile)
-
-nbJob = len (jobDueDate)
-nbResource = len (activityOnAResource[1])
-
-def starttime(job, res):
-   return job * nbJob + res 
-etsp(datafile)
-
+   etsp(datafile)
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# --------------------------------------------------------------------------
+# File: etspbench.py
+# Version 12.6
+# --------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2008, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+# --------------------------------------------------------------------------
+#
+# etspbench.py -  Benchmark the earliness-tardiness scheduling model of
+#                 etsp.py on generated instances
+#
+# For every size, an instance is generated with etsp.generate() and
+# solved twice: without and with the dispatching rule MIP start. The
+# times to build the model, compute and add the MIP start, solve and
+# write the model are measured separately, together with the time to the
+# first incumbent and the final gap. One CSV record is written per solve.
+#
+# To run this example from the command line, use
+#
+#    python etspbench.py [csvfile [jobs:resources ...]]
+#
+# for example
+#
+#    python etspbench.py etsp.csv 10:5 20:10 50:10 100:20
+
+import cplex
+import csv
+import etsp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sizes = [(10, 5), (20, 5), (20, 10), (50, 10), (100, 20)]
+
+# time limit per solve in seconds
+timelimit = 60.0
+
+fields = ["jobs", "resources", "columns", "rows", "indicators", "mipstart",
+          "build", "start", "solve", "write", "firstincumbent", "objective",
+          "gap"]
+
+def runone(data, usestart, directory):
+    """Build, solve and write the model for data and return a record
+    with the fields listed in fields.
+    """
+    model = cplex.Cplex()
+    model.set_log_stream(None)
+    model.set_results_stream(None)
+    model.parameters.timelimit.set(timelimit)
+    model.parameters.emphasis.mip.set(4)
+
+    start = time.time()
+    indicators = etsp.buildmodel(model, *data)
+    buildtime = time.time() - start
+
+    starttime = 0.0
+    if usestart:
+        start = time.time()
+        etsp.addstart(model, *data)
+        starttime = time.time() - start
+
+    incumbent_cb = model.register_callback(etsp.FirstIncumbentCallback)
+    incumbent_cb.firsttime = None
+    incumbent_cb.starttime = model.get_time()
+
+    start = time.time()
+    model.solve()
+    solvetime = time.time() - start
+
+    start = time.time()
+    model.write(os.path.join(directory, "etsp.sav"))
+    writetime = time.time() - start
+
+    if model.solution.is_primal_feasible():
+        objective = model.solution.get_objective_value()
+        gap = model.solution.MIP.get_mip_relative_gap()
+    else:
+        objective = gap = ""
+    return {"jobs": len(data[2]),
+            "resources": len(data[0]),
+            "columns": model.variables.get_num(),
+            "rows": model.linear_constraints.get_num(),
+            "indicators": indicators,
+            "mipstart": int(usestart),
+            "build": "%.4f" % buildtime,
+            "start": "%.4f" % starttime,
+            "solve": "%.4f" % solvetime,
+            "write": "%.4f" % writetime,
+            "firstincumbent": incumbent_cb.firsttime,
+            "objective": objective,
+            "gap": gap}
+
+def etspbench(csvfile, sizes):
+    directory = tempfile.mkdtemp()
+    out = open(csvfile, "wb")
+    try:
+        writer = csv.DictWriter(out, fields)
+        writer.writerow(dict(zip(fields, fields)))
+        for nbJob, nbResource in sizes:
+            data = etsp.generate(nbJob, nbResource)
+            for usestart in (False, True):
+                record = runone(data, usestart, directory)
+                writer.writerow(record)
+                out.flush()
+                print "%4d jobs %3d resources start=%d: build %s start %s " \
+                      "solve %s write %s" % (nbJob, nbResource, usestart,
+                                             record["build"], record["start"],
+                                             record["solve"], record["write"])
+    finally:
+        out.close()
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    csvfile = "etspbench.csv"
+    if len(sys.argv) > 1:
+        csvfile = sys.argv[1]
+    if len(sys.argv) > 2:
+        sizes = [tuple(int(n) for n in arg.split(":"))
+                 for arg in sys.argv[2:]]
+    etspbench(csvfile, sizes)
@@ -7,31 +7,104 @@
 # or within the python interpreter by
 #
 # >>> import facility
+# >>> facility.facility()
+#
+# The model is built by buildmodel() from data in compressed sparse row
+# format, so that large instances, for example those created by
+# generate(), can be loaded with a few calls. See facilitybench.py for a
+# benchmark of the build time.
+#
+# Before solving, a Lagrangian relaxation of the assignment constraints
+# provides a lower bound and a feasible assignment. The assignment is
+# installed as a MIP start and the optimization stops once the incumbent
+# is within the MIP gap of the Lagrangian bound. The subproblems of the
+# relaxation are solved with NumPy if it is installed, and with plain
+# lists otherwise.
+#
+# solvesparse() solves a sparsified model in which each client may only
+# be served by its k cheapest facilities. Omitted pairs are added back
+# when their reduced costs show they may be needed for optimality. With
+# NumPy, the candidates and the reduced costs are computed on arrays.
 
 import cplex
+from cplex.callbacks import MIPInfoCallback
 from cplex.exceptions import CplexSolverError
 from inputdata import read_dat_file 
+from heapq import nsmallest
+from math import hypot
+import random
 import sys
+import time
 
-def facility():
-    # Read in data file. If no file name is given on the command line
-    # we use a default file name. The data we read is
-    # capacity   -- a list/array of facility capacity
-    # fixedcost  -- a list/array of facility fixed cost
-    # cost       -- a matrix for the costs to serve each client by each facility
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-    datafile = "data/facility.dat"
-    if len(sys.argv) < 2:
-        print "Default data file : " + datafile
-    else:
-        datafile = sys.argv[1]
-    capacity, fixedcost, cost = read_dat_file(datafile)
+RC_EPS = 1.0e-6
 
+
+class BoundCallback(MIPInfoCallback):
+    """Abort the optimization once the incumbent is within the relative
+    gap of an externally computed lower bound.
+    """
+
+    def __call__(self):
+        if not self.aborted and self.has_incumbent():
+            incumbent = self.get_incumbent_objective_value()
+            if incumbent - self.bound <= self.gap * abs(incumbent):
+                print "Incumbent", incumbent, "is within the gap of the", \
+                      "Lagrangian bound", self.bound, ", quitting."
+                self.aborted = 1
+                self.abort()
+
+
+def constraintrows(capacity, num_clients):
+    """Return the rows of the facility location model in compressed sparse
+    row format.
+
+    Returns a tuple (rowbeg, ind, val, senses, rhs): row r has the
+    variable indices ind[rowbeg[r]:rowbeg[r+1]] with coefficients
+    val[rowbeg[r]:rowbeg[r+1]]. The first num_clients rows are the
+    assignment constraints, the remaining ones the capacity constraints.
+    Variable f is the open variable of facility f, variable
+    (c+1)*num_facilities+f the supply variable of client c by facility f.
+    """
+    num_facilities = len(capacity)
+    num_supply = num_clients * num_facilities
+
+    # Each client must be assigned to exactly one location: the supply
+    # variables of a client are contiguous.
+    rowbeg = range(0, num_supply, num_facilities)
+    ind = range(num_facilities, num_supply + num_facilities)
+    val = [1.0] * num_supply
+
+    # The number of clients assigned to a facility must be less than the
+    # capacity of the facility, and clients must be assigned to an open
+    # facility: the supply variables of a facility are strided.
+    for f in range(num_facilities):
+        rowbeg.append(len(ind))
+        ind.append(f)
+        ind.extend(range(num_facilities + f, num_supply + num_facilities,
+                         num_facilities))
+        val.append(-capacity[f])
+        val.extend([1.0] * num_clients)
+    rowbeg.append(len(ind))
+
+    senses = "E" * num_clients + "L" * num_facilities
+    rhs = [1] * num_clients + [0] * num_facilities
+    return rowbeg, ind, val, senses, rhs
+
+def buildmodel(model, capacity, fixedcost, cost):
+    """Populate model with the facility location problem.
+
+    All variables are added in two calls and all constraints in one.
+    Returns supply, where supply[c][f] is the index of the variable that
+    models whether client c is served by facility f.
+    """
     num_facilities = len(fixedcost)
     num_clients = len(cost)
-
-    # Create a new (empty) model and populate it below.
-    model = cplex.Cplex()
+    num_supply = num_clients * num_facilities
 
     # Create one binary variable for each facility. The variables model 
     # whether each facility is open or not
@@ -43,48 +116,422 @@ def facility():
 
     # Create one binary variable for each facility/client pair. The variables
     # model whether a client is served by a facility.
-    for c in range(num_clients):
-        model.variables.add(obj = cost[c], 
-                            lb = [0] * num_facilities, 
-                            ub = [1] * num_facilities, 
-                            types = ["B"] * num_facilities)
+    model.variables.add(obj = [x for row in cost for x in row],
+                        lb = [0] * num_supply,
+                        ub = [1] * num_supply,
+                        types = ["B"] * num_supply)
 
     # Create corresponding indices for later use
-    supply = []
-    for c in range(num_clients):
-        supply.append([])
-        for f in range(num_facilities):
-            supply[c].append((c+1)*(num_facilities)+f)
-    # Equivalently, supply can be defined by list comprehension
-    # supply = [[(c + 1) * num_facilities + f
-    #            for f in range(num_facilities)] for c in range(num_clients)]
-    
-
-    # Each client must be assigned to exactly one location    
-    for c in range(num_clients):        
-        assignment_constraint = cplex.SparsePair(ind = [supply[c][f] for f in \
-                                                        range(num_facilities)],
-                                                 val = [1.0] * num_facilities)
-        model.linear_constraints.add(lin_expr = [assignment_constraint],                    
-                                     senses = ["E"], 
-                                     rhs = [1]);
-        
-    # The number of clients assigned to a facility must be less than the
-    # capacity of the facility, and clients must be assigned to an open facility
-    for f in range(num_facilities):
-        index = [f]
-        value = [-capacity[f]]
-        for c in range(num_clients):
-            index.append(supply[c][f])
-            value.append(1.0)
-        capacity_constraint = cplex.SparsePair(ind = index, val = value)
-        model.linear_constraints.add(lin_expr = [capacity_constraint],                    
-                                     senses = ["L"], 
-                                     rhs = [0]);
+    supply = [range((c + 1) * num_facilities, (c + 2) * num_facilities)
+              for c in range(num_clients)]
+
+    rowbeg, ind, val, senses, rhs = constraintrows(capacity, num_clients)
+    model.linear_constraints.add(
+        lin_expr = [cplex.SparsePair(ind = ind[rowbeg[r]:rowbeg[r + 1]],
+                                     val = val[rowbeg[r]:rowbeg[r + 1]])
+                    for r in range(len(rhs))],
+        senses = senses,
+        rhs = rhs)
 
     # Our objective is to minimize cost. Fixed and variable costs 
     # have been set when variables were created.
     model.objective.set_sense(model.objective.sense.minimize)
+    return supply
+
+def generate(num_facilities, num_clients, seed = 0):
+    """Return random data (capacity, fixedcost, cost) for a facility
+    location problem.
+
+    Facilities and clients are placed at random in the unit square and the
+    cost to serve a client by a facility grows with their distance. Total
+    capacity always exceeds the number of clients.
+    """
+    rnd = random.Random(seed)
+    sites = [(rnd.random(), rnd.random()) for f in range(num_facilities)]
+    average = num_clients // num_facilities + 1
+    capacity = [rnd.randint(average, 3 * average) for f in range(num_facilities)]
+    fixedcost = [rnd.randint(100, 500) * average for f in range(num_facilities)]
+    cost = []
+    for c in range(num_clients):
+        x, y = rnd.random(), rnd.random()
+        cost.append([1 + int(100 * hypot(x - sx, y - sy)) for sx, sy in sites])
+    return capacity, fixedcost, cost
+
+def candidatearcs(cost, k):
+    """Return, for each client c, the list of the k facilities that serve
+    c cheapest according to cost[c].
+
+    With NumPy, cost may be an array, as costmatrix() returns.
+    """
+    if numpy is not None:
+        cost = numpy.asarray(cost)
+        if k >= cost.shape[1]:
+            return [range(cost.shape[1]) for c in range(cost.shape[0])]
+        arcs = numpy.argpartition(cost, k - 1, axis = 1)[:, :k]
+        arcs.sort(axis = 1)
+        return arcs.tolist()
+    return [sorted(nsmallest(k, range(len(row)), key = row.__getitem__))
+            for row in cost]
+
+def buildsparse(model, capacity, fixedcost, cost, arcs):
+    """Populate model with the facility location problem restricted to
+    the client/facility pairs in arcs.
+
+    Client c may only be served by the facilities in arcs[c]. Rows are
+    numbered as in buildmodel(). Returns supply, a dictionary that maps a
+    pair (c, f) to the index of its variable.
+    """
+    num_facilities = len(fixedcost)
+    num_clients = len(cost)
+
+    model.variables.add(obj = fixedcost,
+                        lb = [0] * num_facilities,
+                        ub = [1] * num_facilities,
+                        types = ["B"] * num_facilities)
+
+    pairs = [(c, f) for c in range(num_clients) for f in arcs[c]]
+    model.variables.add(obj = [cost[c][f] for c, f in pairs],
+                        lb = [0] * len(pairs),
+                        ub = [1] * len(pairs),
+                        types = ["B"] * len(pairs))
+    supply = dict(zip(pairs, range(num_facilities,
+                                   num_facilities + len(pairs))))
+
+    assignind = [[] for c in range(num_clients)]
+    capind = [[f] for f in range(num_facilities)]
+    for (c, f), j in supply.iteritems():
+        assignind[c].append(j)
+        capind[f].append(j)
+    model.linear_constraints.add(
+        lin_expr = [cplex.SparsePair(ind = ind, val = [1.0] * len(ind))
+                    for ind in assignind] +
+                   [cplex.SparsePair(ind = capind[f],
+                                     val = [-capacity[f]] +
+                                           [1.0] * (len(capind[f]) - 1))
+                    for f in range(num_facilities)],
+        senses = "E" * num_clients + "L" * num_facilities,
+        rhs = [1] * num_clients + [0] * num_facilities)
+
+    model.objective.set_sense(model.objective.sense.minimize)
+    return supply
+
+def addarcs(model, cost, supply, pairs):
+    """Add the variables for the client/facility pairs in pairs to a model
+    built by buildsparse() and record them in supply.
+    """
+    num_clients = len(cost)
+    start = model.variables.get_num()
+    model.variables.add(obj = [cost[c][f] for c, f in pairs],
+                        lb = [0] * len(pairs),
+                        ub = [1] * len(pairs),
+                        columns = [cplex.SparsePair(ind = [c, num_clients + f],
+                                                    val = [1.0, 1.0])
+                                   for c, f in pairs])
+    for j in range(len(pairs)):
+        supply[pairs[j]] = start + j
+
+def costmatrix(cost):
+    """Return cost as an array if NumPy is installed, and unchanged
+    otherwise, for candidatearcs() and omittedarcs().
+    """
+    if numpy is None:
+        return cost
+    return numpy.array(cost, dtype = float)
+
+def omittedarcs(cost, supply, duals, threshold):
+    """Return the client/facility pairs not in supply whose reduced cost
+    with respect to duals is below threshold.
+
+    With NumPy, cost may be an array, as costmatrix() returns.
+    """
+    num_clients = len(cost)
+    if numpy is not None:
+        duals = numpy.asarray(duals)
+        reduced = numpy.asarray(cost) - duals[:num_clients, None] \
+                  - duals[None, num_clients:]
+        modeled = numpy.array(supply.keys(), dtype = int).reshape(-1, 2)
+        reduced[modeled[:, 0], modeled[:, 1]] = numpy.inf
+        clients, facilities = numpy.nonzero(reduced < threshold)
+        return zip(clients.tolist(), facilities.tolist())
+    return [(c, f) for c in range(num_clients)
+            for f in range(len(cost[c]))
+            if (c, f) not in supply and
+               cost[c][f] - duals[c] - duals[num_clients + f] < threshold]
+
+def solvesparse(model, capacity, fixedcost, cost, k):
+    """Solve the facility location problem with candidate arcs.
+
+    Only the k cheapest facilities of each client are modeled at first.
+    Omitted pairs with negative reduced cost are then priced into the LP
+    relaxation until it is optimal for the full model. After the MIP is
+    solved, every omitted pair whose reduced cost is less than the gap
+    between incumbent and LP bound could still improve the incumbent, so
+    these are added and the MIP is solved again.
+
+    Returns supply as for buildsparse().
+    """
+    matrix = costmatrix(cost)
+    supply = buildsparse(model, capacity, fixedcost, cost,
+                         candidatearcs(matrix, k))
+
+    model.set_problem_type(model.problem_type.LP)
+    while True:
+        model.solve()
+        if model.solution.is_primal_feasible():
+            duals = model.solution.get_dual_values()
+            pairs = omittedarcs(matrix, supply, duals, -RC_EPS)
+        else:
+            # Too few arcs to serve all clients: add all of them.
+            duals = [0.0] * model.linear_constraints.get_num()
+            pairs = omittedarcs(matrix, supply, duals, cplex.infinity)
+        if len(pairs) == 0:
+            break
+        addarcs(model, cost, supply, pairs)
+    lpbound = model.solution.get_objective_value()
+
+    numcols = model.variables.get_num()
+    model.variables.set_types(zip(range(numcols), ["B"] * numcols))
+    model.solve()
+    if model.solution.is_primal_feasible():
+        gap = model.solution.get_objective_value() - lpbound
+    else:
+        gap = cplex.infinity
+    pairs = omittedarcs(matrix, supply, duals, gap)
+    if len(pairs) > 0:
+        addarcs(model, cost, supply, pairs)
+        model.variables.set_types(zip(range(numcols, numcols + len(pairs)),
+                                      ["B"] * len(pairs)))
+        model.solve()
+    return supply
+
+def repair(opened, capacity, fixedcost, cost):
+    """Return a feasible assignment that uses the facilities in opened.
+
+    If the open facilities lack capacity, more are opened in order of
+    fixed cost per unit of capacity. Clients are then assigned in order of
+    decreasing regret to their cheapest open facility with capacity left.
+    Returns a tuple (assign, total) where assign[c] is the facility that
+    serves client c and total is the cost of the assignment, or
+    (None, cplex.infinity) if total capacity is insufficient.
+    """
+    num_facilities = len(fixedcost)
+    num_clients = len(cost)
+
+    isopen = [False] * num_facilities
+    for f in opened:
+        isopen[f] = True
+    total = sum(capacity[f] for f in opened)
+    for f in sorted(range(num_facilities),
+                    key = lambda f: fixedcost[f] / float(capacity[f])):
+        if total >= num_clients:
+            break
+        if not isopen[f]:
+            isopen[f] = True
+            total += capacity[f]
+    if total < num_clients:
+        return None, cplex.infinity
+
+    candidates = [f for f in range(num_facilities) if isopen[f]]
+    prefs = [sorted(candidates, key = cost[c].__getitem__)
+             for c in range(num_clients)]
+    def regret(c):
+        if len(prefs[c]) < 2:
+            return cplex.infinity
+        return cost[c][prefs[c][1]] - cost[c][prefs[c][0]]
+
+    left = capacity[:]
+    assign = [None] * num_clients
+    for c in sorted(range(num_clients), key = regret, reverse = True):
+        for f in prefs[c]:
+            if left[f] > 0:
+                left[f] -= 1
+                assign[c] = f
+                break
+
+    # Facilities that serve no client are not opened.
+    used = set(assign)
+    total = sum(fixedcost[f] for f in used) + \
+            sum(cost[c][assign[c]] for c in range(num_clients))
+    return assign, total
+
+def knapsacks(columns, u, capacity, fixedcost):
+    """Solve the Lagrangian subproblem of every facility.
+
+    columns[f] lists the cost of serving each client by facility f.
+    Returns a tuple (value, opened, served) where value is the sum of the
+    negative subproblem values, opened lists the facilities opened by the
+    relaxation and served[c] counts the open facilities that serve c.
+    """
+    num_clients = len(u)
+    value = 0.0
+    served = [0] * num_clients
+    opened = []
+    for f in range(len(fixedcost)):
+        # Only clients with negative reduced cost are candidates.
+        column = columns[f]
+        reduced = [(column[c] - u[c], c) for c in range(num_clients)
+                   if column[c] < u[c]]
+        if len(reduced) > capacity[f]:
+            reduced = nsmallest(capacity[f], reduced)
+        open_value = fixedcost[f] + sum(rc for rc, c in reduced)
+        if open_value < 0:
+            value += open_value
+            opened.append(f)
+            for rc, c in reduced:
+                served[c] += 1
+    return value, opened, served
+
+def knapsacksnumpy(columns, u, capacity, fixedcost):
+    """Same as knapsacks(), with columns a facilities by clients array
+    and u an array.
+    """
+    value = 0.0
+    served = numpy.zeros(len(u), dtype = int)
+    opened = []
+    reduced = columns - u
+    for f in range(len(fixedcost)):
+        chosen = numpy.flatnonzero(reduced[f] < 0)
+        if len(chosen) > capacity[f]:
+            part = numpy.argpartition(reduced[f, chosen], capacity[f] - 1)
+            chosen = chosen[part[:capacity[f]]]
+        open_value = fixedcost[f] + reduced[f, chosen].sum()
+        if open_value < 0:
+            value += open_value
+            opened.append(f)
+            served[chosen] += 1
+    return value, opened, served
+
+def lagrangian(capacity, fixedcost, cost, maxiter = 100, timelimit = None):
+    """Lagrangian relaxation of the assignment constraints.
+
+    With a multiplier u[c] for the assignment constraint of client c, the
+    relaxation decomposes into one knapsack per facility with unit
+    weights: if opened, facility f serves the capacity[f] clients of most
+    negative reduced cost cost[c][f] - u[c]. The multipliers are updated
+    by subgradient optimization, and whenever the relaxation opens a new
+    set of facilities it is repaired to a feasible assignment. The
+    iterations stop after maxiter or, if given, timelimit seconds.
+
+    Returns a tuple (bound, assign, total) where bound is a lower bound on
+    the optimal cost and assign the best assignment found, of cost total.
+    """
+    start = time.time()
+    num_clients = len(cost)
+    if numpy is not None:
+        columns = numpy.array(cost, dtype = float).T
+        u = columns.min(axis = 0)
+        solve = knapsacksnumpy
+    else:
+        columns = zip(*cost)
+        u = [min(row) for row in cost]
+        solve = knapsacks
+
+    bound = -cplex.infinity
+    assign, total = None, cplex.infinity
+    repaired = set()
+    theta = 2.0
+    stall = 0
+    for it in range(maxiter):
+        value, opened, served = solve(columns, u, capacity, fixedcost)
+        value += sum(u)
+
+        if value > bound:
+            bound = value
+            stall = 0
+        else:
+            stall += 1
+            if stall >= 10:
+                theta /= 2.0
+                stall = 0
+
+        key = tuple(opened)
+        if key not in repaired:
+            repaired.add(key)
+            candidate, candidate_total = repair(opened, capacity, fixedcost,
+                                                cost)
+            if candidate_total < total:
+                assign, total = candidate, candidate_total
+
+        # Subgradient step towards the best known upper bound
+        subgradient = [1 - served[c] for c in range(num_clients)]
+        norm = sum(g * g for g in subgradient)
+        if norm == 0 or total - bound <= 1e-6 * abs(total):
+            break
+        if timelimit is not None and time.time() - start >= timelimit:
+            break
+        step = theta * (total - value) / norm
+        if numpy is not None:
+            u = u + step * numpy.array(subgradient)
+        else:
+            u = [u[c] + step * subgradient[c] for c in range(num_clients)]
+
+    return float(bound), assign, total
+
+def addstart(model, supply, assign):
+    """Install the assignment assign as a MIP start of model."""
+    num_facilities = len(supply[0])
+    ind = range(num_facilities)
+    val = [0] * num_facilities
+    for f in set(assign):
+        val[f] = 1
+    for c in range(len(supply)):
+        ind.extend(supply[c])
+        val.extend([0] * num_facilities)
+        val[-num_facilities + assign[c]] = 1
+    model.MIP_starts.add(cplex.SparsePair(ind = ind, val = val),
+                         model.MIP_starts.effort_level.check_feasibility)
+
+def extractsolution(x, num_facilities, num_clients, tol):
+    """Extract open facilities and assigned clients from the values x of
+    all variables of a model built by buildmodel().
+
+    The supply values are viewed as a num_clients by num_facilities
+    matrix. Returns a tuple (opened, served) where opened lists the open
+    facilities and served[f] lists the clients served by facility f.
+    """
+    opened = [f for f in range(num_facilities) if x[f] > tol]
+    served = [[] for f in range(num_facilities)]
+    for c in range(num_clients):
+        row = x[(c + 1) * num_facilities:(c + 2) * num_facilities]
+        for f in range(num_facilities):
+            if row[f] > tol:
+                served[f].append(c)
+    return opened, served
+
+def facility():
+    # Read in data file. If no file name is given on the command line
+    # we use a default file name. The data we read is
+    # capacity   -- a list/array of facility capacity
+    # fixedcost  -- a list/array of facility fixed cost
+    # cost       -- a matrix for the costs to serve each client by each facility
+
+    datafile = "data/facility.dat"
+    if len(sys.argv) < 2:
+        print "Default data file : " + datafile
+    else:
+        datafile = sys.argv[1]
+    capacity, fixedcost, cost = read_dat_file(datafile)
+
+    num_facilities = len(fixedcost)
+    num_clients = len(cost)
+
+    # Create a new (empty) model and populate it below.
+    model = cplex.Cplex()
+    supply = buildmodel(model, capacity, fixedcost, cost)
+
+    # Compute a lower bound and a feasible assignment by Lagrangian
+    # relaxation. The assignment is used as a MIP start and the
+    # optimization stops as soon as the incumbent is within the relative
+    # MIP gap of the bound.
+    bound, assign, total = lagrangian(capacity, fixedcost, cost,
+                                      timelimit = 10.0)
+    print "Lagrangian bound = ", bound, ", heuristic cost = ", total
+    if assign is not None:
+        addstart(model, supply, assign)
+    bound_cb = model.register_callback(BoundCallback)
+    bound_cb.bound = bound
+    bound_cb.gap = model.parameters.mip.tolerances.mipgap.get()
+    bound_cb.aborted = 0
 
     # Solve                                                         
     try:
@@ -102,14 +549,12 @@ def facility():
         # Display solution.
         print "Total cost = " , solution.get_objective_value()                
                                 
-        for f in range(num_facilities):
-            if (solution.get_values(f) >
-                model.parameters.mip.tolerances.integrality.get()):
-                print "Facility %d is open and serves the following clients:" % f,
-                for c in range(num_clients):
-                    if (solution.get_values(supply[c][f]) >
-                        model.parameters.mip.tolerances.integrality.get()):
-                        print c,
-                print
-
-facility()
+        tol = model.parameters.mip.tolerances.integrality.get()
+        opened, served = extractsolution(solution.get_values(),
+                                         num_facilities, num_clients, tol)
+        for f in opened:
+            print "Facility %d is open and serves the following clients:" % f,
+            print " ".join(str(c) for c in served[f])
+
+if __name__ == "__main__":
+    facility()
@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: facilitybench.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# facilitybench.py -  Benchmark the model build of facility.py
+#
+# Random facility location problems of increasing size are created with
+# facility.generate(). Each is built twice: once with one
+# linear_constraints.add call per constraint, as facility.py used to do,
+# and once with facility.buildmodel(), which adds all rows in one call.
+#
+# With the option -k, the dense model built by facility.buildmodel() is
+# compared against facility.solvesparse() with k candidate facilities per
+# client instead: model size, growth of the peak memory of the process,
+# and time to build and solve are reported for both.
+#
+# You can run this example at the command line by
+#
+#    python facilitybench.py [-k k] [facilities:clients ...]
+#
+# for example
+#
+#    python facilitybench.py 100:5000 500:20000 2000:50000
+#    python facilitybench.py -k 5 20:200 50:1000
+
+import cplex
+import facility
+import resource
+import sys
+import time
+
+sizes = [(10, 100), (50, 1000), (100, 5000), (200, 20000)]
+solvesizes = [(10, 100), (20, 200), (50, 500)]
+
+def buildbyrow(model, capacity, fixedcost, cost):
+    """Populate model one row at a time, for comparison."""
+    num_facilities = len(fixedcost)
+    num_clients = len(cost)
+    model.variables.add(obj = fixedcost,
+                        lb = [0] * num_facilities,
+                        ub = [1] * num_facilities,
+                        types = ["B"] * num_facilities)
+    for c in range(num_clients):
+        model.variables.add(obj = cost[c],
+                            lb = [0] * num_facilities,
+                            ub = [1] * num_facilities,
+                            types = ["B"] * num_facilities)
+    supply = [[(c + 1) * num_facilities + f for f in range(num_facilities)]
+              for c in range(num_clients)]
+    for c in range(num_clients):
+        model.linear_constraints.add(
+            lin_expr = [cplex.SparsePair(ind = supply[c],
+                                         val = [1.0] * num_facilities)],
+            senses = ["E"], rhs = [1])
+    for f in range(num_facilities):
+        index = [f]
+        value = [-capacity[f]]
+        for c in range(num_clients):
+            index.append(supply[c][f])
+            value.append(1.0)
+        model.linear_constraints.add(
+            lin_expr = [cplex.SparsePair(ind = index, val = value)],
+            senses = ["L"], rhs = [0])
+    model.objective.set_sense(model.objective.sense.minimize)
+    return supply
+
+def timebuild(build, capacity, fixedcost, cost):
+    """Return the time taken by build to populate a new model."""
+    model = cplex.Cplex()
+    start = time.time()
+    build(model, capacity, fixedcost, cost)
+    return time.time() - start
+
+def facilitybench(sizes):
+    print "%10s %10s %12s %10s %10s %10s" % ("facilities", "clients",
+                                             "nonzeros", "generate",
+                                             "byrow", "bulk")
+    for num_facilities, num_clients in sizes:
+        start = time.time()
+        capacity, fixedcost, cost = facility.generate(num_facilities,
+                                                      num_clients)
+        gentime = time.time() - start
+        rowtime = timebuild(buildbyrow, capacity, fixedcost, cost)
+        bulktime = timebuild(facility.buildmodel, capacity, fixedcost, cost)
+        print "%10d %10d %12d %10.3f %10.3f %10.3f" % \
+              (num_facilities, num_clients,
+               num_facilities * (2 * num_clients + 1),
+               gentime, rowtime, bulktime)
+
+def timesolve(solve, *args):
+    """Solve a new model by solve(model, *args) and return the model,
+    the time taken and the growth of the peak memory in kilobytes.
+    """
+    model = cplex.Cplex()
+    model.set_log_stream(None)
+    model.set_results_stream(None)
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    solve(model, *args)
+    seconds = time.time() - start
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory
+    return model, seconds, memory
+
+def solvedense(model, capacity, fixedcost, cost):
+    facility.buildmodel(model, capacity, fixedcost, cost)
+    model.solve()
+
+def sparsebench(sizes, k):
+    print "%10s %10s %6s %10s %12s %10s %10s %14s" % \
+          ("facilities", "clients", "model", "columns", "nonzeros",
+           "memory", "seconds", "objective")
+    for num_facilities, num_clients in sizes:
+        capacity, fixedcost, cost = facility.generate(num_facilities,
+                                                      num_clients)
+        # The sparse model is solved first so that the growth of the peak
+        # memory is not hidden by the larger dense model.
+        for name, solve, args in \
+                [("k=%d" % k, facility.solvesparse,
+                  (capacity, fixedcost, cost, k)),
+                 ("dense", solvedense, (capacity, fixedcost, cost))]:
+            model, seconds, memory = timesolve(solve, *args)
+            print "%10d %10d %6s %10d %12d %10d %10.3f %14.2f" % \
+                  (num_facilities, num_clients, name,
+                   model.variables.get_num(),
+                   model.linear_constraints.get_num_nonzeros(),
+                   memory, seconds, model.solution.get_objective_value())
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    k = None
+    if len(args) > 1 and args[0] == "-k":
+        k = int(args[1])
+        args = args[2:]
+        sizes = solvesizes
+    if len(args) > 0:
+        sizes = [tuple(int(n) for n in arg.split(":")) for arg in args]
+    if k is None:
+        facilitybench(sizes)
+    else:
+        sparsebench(sizes, k)
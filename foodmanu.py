@@ -25,6 +25,7 @@
 # To run from within the python interpreter, use
 #
 # >>> import foodmanu
+# >>> foodmanu.foodmanu()
 
 import sys
 
@@ -196,6 +197,16 @@ def varindex(m, p, whichvar):
    return m*NUMVARS*NUMPRODUCTS + p*NUMVARS + whichvar
 
 
+def setcost(prob, cost):
+   """Change the cost of all buy variables in one call.
+
+   cost lists the costs in the order of the global cost array.
+   """
+   buy = [varindex(m, p, BUY) for m in range(NUMMONTHS)
+          for p in range(NUMPRODUCTS)]
+   prob.objective.set_linear(zip(buy, [-c for c in cost]))
+
+
 def foodmanu():
     prob = cplex.Cplex()
 
@@ -237,4 +248,5 @@ def foodmanu():
         print
         
 
-foodmanu()
+if __name__ == "__main__":
+    foodmanu()
@@ -0,0 +1,306 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: foodmanulshaped.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# foodmanulshaped.py -- a two-stage stochastic version of the food
+#                       manufacturing problem solved by the L-shaped method
+#
+# The purchases of the first month are made at the known prices of
+# foodmanu.cost. The prices of the following months are uncertain and
+# given by a set of equally likely price paths, as created by
+# foodmanusweep.generate(). Once the prices are known, the purchases of
+# the later months, the use and the storage of all oils are planned.
+#
+# The recourse problem of a price path is the linear relaxation of the
+# model of foodmanu.py: the rule that an oil used is used at least 20
+# tons, the limit of three oils per month and the indicator constraints
+# are dropped, since optimality cuts need the duals of an LP. With at most
+# 500 tons of each oil bought in the first month, every recourse problem
+# is feasible, so no feasibility cuts are needed.
+#
+# The master problem holds the first month purchases and one variable per
+# batch of price paths that bounds the expected profit of the batch. In
+# each iteration the recourse problems are solved in a pool of worker
+# processes, each of which builds its recourse problem once and only
+# changes prices and first month purchases. One optimality cut per batch
+# is added, aggregated over the price paths in the batch.
+#
+# To run from the command line, use
+#
+#    python foodmanulshaped.py [scenarios [batches [processes]]]
+#
+# This solves the problem with the L-shaped method and as one extensive
+# form LP with one copy of the recourse problem per price path, and
+# compares the times.
+
+import cplex
+import foodmanu
+import foodmanusweep
+from multiprocessing import Pool
+import sys
+import time
+
+NUMPRODUCTS = foodmanu.NUMPRODUCTS
+NUMMONTHS = foodmanu.NUMMONTHS
+
+# Variables of the recourse problem per month and product.
+NUMRECVARS = 3
+
+BUY = 0
+USE = 1
+STORE = 2
+
+# most oil that can be bought in the first month
+maxbuy = 500.0
+
+# The profit of a month is at most 150 per ton for 450 tons.
+maxprofit = 150.0 * 450.0 * NUMMONTHS
+
+# Recourse problem reused by all batches solved in a worker process and
+# the index of its first month balance rows.
+workerprob = None
+workerrows = None
+
+def recindex(base, m, p, whichvar):
+    return base + m * NUMRECVARS * NUMPRODUCTS + p * NUMRECVARS + whichvar
+
+def addrecourse(prob, spot, weight = 1.0, firststage = None):
+    """Add the recourse problem of the price path spot to prob.
+
+    spot lists the prices in the layout of foodmanu.cost; the prices of
+    the first month are not used. The profit is scaled by weight. If
+    firststage lists the indices of the first month purchase variables,
+    they appear in the first month balance rows. Otherwise the right hand
+    sides of these rows must be set with setfirststage().
+
+    Returns the list of indices of the first month balance rows.
+    """
+    base = prob.variables.get_num()
+    obj = []
+    lb = []
+    ub = []
+    for m in range(NUMMONTHS):
+        for p in range(NUMPRODUCTS):
+            if m == 0:
+                # Bought in the first stage.
+                obj.append(0.0)
+                ub.append(0.0)
+            else:
+                obj.append(-weight * spot[m * NUMPRODUCTS + p])
+                ub.append(cplex.infinity)
+            lb.append(0.0)
+            obj.extend([0.0, -weight * 5.0])
+            if m == NUMMONTHS - 1:
+                lb.extend([0.0, 500.0])
+                ub.extend([cplex.infinity, 500.0])
+            else:
+                lb.extend([0.0, 0.0])
+                ub.extend([cplex.infinity, 1000.0])
+    product = range(len(obj), len(obj) + NUMMONTHS)
+    obj.extend([weight * 150.0] * NUMMONTHS)
+    lb.extend([0.0] * NUMMONTHS)
+    ub.extend([cplex.infinity] * NUMMONTHS)
+    prob.variables.add(obj = obj, lb = lb, ub = ub)
+
+    rows = []
+    senses = ""
+    rhs = []
+    for m in range(NUMMONTHS):
+        use = [recindex(base, m, p, USE) for p in range(NUMPRODUCTS)]
+        rows.append([use[foodmanu.VEGOIL1:foodmanu.OIL1], [1.0, 1.0]])
+        rows.append([use[foodmanu.OIL1:], [1.0, 1.0, 1.0]])
+        rows.append([use + [base + product[m]], [1.0] * NUMPRODUCTS + [-1.0]])
+        rows.append([use + [base + product[m]], foodmanu.hardness + [-3.0]])
+        rows.append([use + [base + product[m]], foodmanu.hardness + [-6.0]])
+        senses += "LLEGL"
+        rhs.extend([200.0, 250.0, 0.0, 0.0, 0.0])
+    balance = range(prob.linear_constraints.get_num() + len(rows),
+                    prob.linear_constraints.get_num() + len(rows) + NUMPRODUCTS)
+    for m in range(NUMMONTHS):
+        for p in range(NUMPRODUCTS):
+            ind = [recindex(base, m, p, BUY), recindex(base, m, p, USE),
+                   recindex(base, m, p, STORE)]
+            val = [1.0, -1.0, -1.0]
+            if m == 0:
+                if firststage is not None:
+                    ind.append(firststage[p])
+                    val.append(1.0)
+                rhs.append(-500.0)
+            else:
+                ind.append(recindex(base, m - 1, p, STORE))
+                val.append(1.0)
+                rhs.append(0.0)
+            rows.append([ind, val])
+            senses += "E"
+    prob.linear_constraints.add(lin_expr = rows, senses = senses, rhs = rhs)
+    return balance
+
+def setprices(prob, spot):
+    """Change the prices of the recourse problem in prob, which must have
+    been built by addrecourse() without first stage variables.
+    """
+    buy = [recindex(0, m, p, BUY) for m in range(1, NUMMONTHS)
+           for p in range(NUMPRODUCTS)]
+    prob.objective.set_linear(zip(buy, [-c for c in spot[NUMPRODUCTS:]]))
+
+def setfirststage(prob, balance, buy):
+    """Set the first month purchases buy in the balance rows."""
+    prob.linear_constraints.set_rhs(zip(balance, [-500.0 - b for b in buy]))
+
+def createrecourse():
+    """Create a recourse problem that is reused for all price paths."""
+    prob = cplex.Cplex()
+    prob.set_log_stream(None)
+    prob.set_results_stream(None)
+    balance = addrecourse(prob, foodmanu.cost)
+    return prob, balance
+
+def initworker():
+    """Create the recourse problem reused by a worker process."""
+    global workerprob, workerrows
+    workerprob, workerrows = createrecourse()
+
+def solvebatch(task):
+    """Solve the recourse problems of one batch in a worker process.
+
+    The task argument is a tuple (key, spots, buy, weight). Returns a
+    tuple (key, value, gradient), where value is the weighted sum of the
+    recourse profits at the first month purchases buy and gradient its
+    gradient with respect to buy.
+    """
+    key, spots, buy, weight = task
+    setfirststage(workerprob, workerrows, buy)
+    value = 0.0
+    gradient = [0.0] * NUMPRODUCTS
+    for spot in spots:
+        setprices(workerprob, spot)
+        # The previous basis stays dual feasible only if the prices did
+        # not change, and primal feasible only if buy did not change, so
+        # leave the choice of the algorithm to CPLEX.
+        workerprob.solve()
+        value += weight * workerprob.solution.get_objective_value()
+        # Raising buy[p] lowers the right hand side of its balance row.
+        duals = workerprob.solution.get_dual_values(workerrows)
+        for p in range(NUMPRODUCTS):
+            gradient[p] -= weight * duals[p]
+    return key, value, gradient
+
+def lshaped(scenarios, nbbatches = 10, processes = None, tol = 1e-6,
+            maxiter = 100, verbose = True):
+    """Solve the two-stage problem by the L-shaped method.
+
+    The scenarios are split into nbbatches batches, and one optimality
+    cut per batch is added in every iteration. Returns a tuple
+    (buy, profit, iterations), where buy lists the first month purchases.
+    """
+    weight = 1.0 / len(scenarios)
+    size = -(-len(scenarios) // nbbatches)
+    batches = [scenarios[k:k + size] for k in range(0, len(scenarios), size)]
+
+    master = cplex.Cplex()
+    master.set_log_stream(None)
+    master.set_results_stream(None)
+    master.objective.set_sense(master.objective.sense.maximize)
+    buyvars = range(NUMPRODUCTS)
+    master.variables.add(obj = [-c for c in foodmanu.cost[:NUMPRODUCTS]],
+                         lb = [0.0] * NUMPRODUCTS,
+                         ub = [maxbuy] * NUMPRODUCTS)
+    thetavars = range(NUMPRODUCTS, NUMPRODUCTS + len(batches))
+    master.variables.add(obj = [1.0] * len(batches),
+                         lb = [-cplex.infinity] * len(batches),
+                         ub = [weight * len(batch) * maxprofit
+                               for batch in batches])
+
+    pool = Pool(processes, initworker)
+    try:
+        for iteration in range(1, maxiter + 1):
+            master.solve()
+            upper = master.solution.get_objective_value()
+            x = master.solution.get_values()
+            buy = x[:NUMPRODUCTS]
+            theta = x[NUMPRODUCTS:]
+
+            tasks = [(key, batches[key], buy, weight)
+                     for key in range(len(batches))]
+            lower = sum(-foodmanu.cost[p] * buy[p]
+                        for p in range(NUMPRODUCTS))
+            rows = []
+            rhs = []
+            for key, value, gradient in pool.imap_unordered(solvebatch,
+                                                             tasks):
+                lower += value
+                if theta[key] > value + tol * max(1.0, abs(value)):
+                    # theta <= value + gradient * (b - buy)
+                    rows.append([[thetavars[key]] + buyvars,
+                                 [1.0] + [-g for g in gradient]])
+                    rhs.append(value - sum(gradient[p] * buy[p]
+                                           for p in range(NUMPRODUCTS)))
+            if verbose:
+                print "Iteration %3d: %14.4f <= profit <= %14.4f, %d cuts" \
+                      % (iteration, lower, upper, len(rows))
+            if len(rows) == 0 or upper - lower <= tol * max(1.0, abs(upper)):
+                break
+            master.linear_constraints.add(lin_expr = rows,
+                                          senses = "L" * len(rows),
+                                          rhs = rhs)
+    finally:
+        pool.terminate()
+    return buy, lower, iteration
+
+def extensive(prob, scenarios):
+    """Build the extensive form of the two-stage problem in prob.
+
+    Returns the indices of the first month purchase variables.
+    """
+    weight = 1.0 / len(scenarios)
+    prob.objective.set_sense(prob.objective.sense.maximize)
+    buyvars = range(NUMPRODUCTS)
+    prob.variables.add(obj = [-c for c in foodmanu.cost[:NUMPRODUCTS]],
+                       lb = [0.0] * NUMPRODUCTS,
+                       ub = [maxbuy] * NUMPRODUCTS)
+    for spot in scenarios:
+        addrecourse(prob, spot, weight, buyvars)
+    return buyvars
+
+
+if __name__ == "__main__":
+    nbscenarios = 200
+    nbbatches = 10
+    processes = None
+    if len(sys.argv) > 1:
+        nbscenarios = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        nbbatches = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        processes = int(sys.argv[3])
+    scenarios = foodmanusweep.generate(nbscenarios)
+
+    start = time.time()
+    buy, profit, iterations = lshaped(scenarios, nbbatches, processes)
+    lshapedtime = time.time() - start
+
+    prob = cplex.Cplex()
+    prob.set_log_stream(None)
+    prob.set_results_stream(None)
+    start = time.time()
+    buyvars = extensive(prob, scenarios)
+    prob.solve()
+    extensivetime = time.time() - start
+
+    print
+    print "%-10s %10s %14s %s" % ("method", "seconds", "profit", "buy")
+    print "%-10s %10.3f %14.4f %s" % ("L-shaped", lshapedtime, profit,
+                                      " ".join("%.2f" % b for b in buy))
+    print "%-10s %10.3f %14.4f %s" % \
+          ("extensive", extensivetime, prob.solution.get_objective_value(),
+           " ".join("%.2f" % b for b in prob.solution.get_values(buyvars)))
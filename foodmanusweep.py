@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: foodmanusweep.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# foodmanusweep.py -- solving the food manufacturing problem for many
+#                     price scenarios
+#
+# A scenario is a cost vector in the layout of foodmanu.cost. The model of
+# foodmanu.py is built once; for each scenario only the cost of the buy
+# variables is changed, in one call, and the model is solved again.
+# Changing the objective does not change the feasible region, so the
+# solution of the previous scenario is added as a MIP start. The search
+# tree itself cannot be reused after the objective changed.
+#
+# The function sweep() solves the scenarios one after the other in a
+# single model. The function parallelsweep() splits the scenarios into
+# contiguous shards that are swept in a pool of worker processes, each of
+# which builds the model once. Both return the objective values and a
+# matrix with one row per scenario and one column per variable.
+#
+# To run from the command line, use
+#
+#    python foodmanusweep.py [scenarios [processes]]
+#
+# This sweeps randomly perturbed copies of foodmanu.cost.
+#
+# To run from within the python interpreter, use
+#
+# >>> import foodmanusweep
+
+import cplex
+import foodmanu
+from multiprocessing import Pool, cpu_count
+import random
+import sys
+import time
+
+# Problem reused by all shards swept in a worker process.
+workerprob = None
+
+def generate(nbscenarios, spread = 0.2, seed = 0):
+    """Return nbscenarios cost vectors, each entry of foodmanu.cost scaled
+    by a random factor within 1 - spread and 1 + spread.
+    """
+    rnd = random.Random(seed)
+    return [[c * rnd.uniform(1.0 - spread, 1.0 + spread)
+             for c in foodmanu.cost]
+            for k in range(nbscenarios)]
+
+def createproblem():
+    """Create and build the problem that is reused for all scenarios."""
+    prob = cplex.Cplex()
+    prob.set_log_stream(None)
+    prob.set_results_stream(None)
+    foodmanu.buildmodel(prob)
+    return prob
+
+def sweep(prob, scenarios):
+    """Solve the model in prob for each cost vector in scenarios.
+
+    Returns (objectives, matrix), where objectives[k] is the objective
+    value for scenario k and matrix[k] lists the values of all variables.
+    Both are None for a scenario without a solution.
+    """
+    numcols = prob.variables.get_num()
+    objectives = []
+    matrix = []
+    for scenario in scenarios:
+        foodmanu.setcost(prob, scenario)
+        prob.solve()
+        if prob.solution.is_primal_feasible():
+            x = prob.solution.get_values()
+            objectives.append(prob.solution.get_objective_value())
+            matrix.append(x)
+            # Start the next scenario from this solution, which stays
+            # feasible as only the objective changes.
+            prob.MIP_starts.delete()
+            prob.MIP_starts.add(cplex.SparsePair(ind = range(numcols),
+                                                 val = x),
+                                prob.MIP_starts.effort_level.check_feasibility)
+        else:
+            objectives.append(None)
+            matrix.append(None)
+    return objectives, matrix
+
+def initworker():
+    """Create the problem reused by a worker process."""
+    global workerprob
+    workerprob = createproblem()
+
+def sweepshard(task):
+    """Sweep one shard in a worker process.
+
+    The task argument is a tuple (key, scenarios). Returns a tuple
+    (key, objectives, matrix).
+    """
+    key, scenarios = task
+    objectives, matrix = sweep(workerprob, scenarios)
+    return key, objectives, matrix
+
+def parallelsweep(scenarios, processes = None, shardsize = None):
+    """Sweep scenarios in a pool of worker processes.
+
+    The scenarios are split into contiguous shards of shardsize
+    scenarios, by default one shard per process, so that each worker
+    warm starts from similar scenarios. The number of worker processes
+    defaults to the number of CPUs. Returns (objectives, matrix) in the
+    order of scenarios, as sweep() does.
+    """
+    pool = Pool(processes, initworker)
+    try:
+        if shardsize is None:
+            shards = processes or cpu_count()
+            shardsize = max(1, -(-len(scenarios) // shards))
+        tasks = [(key, scenarios[key:key + shardsize])
+                 for key in range(0, len(scenarios), shardsize)]
+        objectives = [None] * len(scenarios)
+        matrix = [None] * len(scenarios)
+        for key, obj, x in pool.imap_unordered(sweepshard, tasks):
+            objectives[key:key + len(obj)] = obj
+            matrix[key:key + len(x)] = x
+        return objectives, matrix
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    nbscenarios = 50
+    processes = None
+    if len(sys.argv) > 1:
+        nbscenarios = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        processes = int(sys.argv[2])
+    scenarios = generate(nbscenarios)
+
+    start = time.time()
+    objectives, matrix = sweep(createproblem(), scenarios)
+    print "Sequential sweep: %.3f sec" % (time.time() - start)
+
+    start = time.time()
+    parobjectives, parmatrix = parallelsweep(scenarios, processes)
+    print "Parallel sweep:   %.3f sec" % (time.time() - start)
+
+    for k in range(nbscenarios):
+        print "Scenario %3d: %s %s" % (k, objectives[k], parobjectives[k])
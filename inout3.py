@@ -34,7 +34,9 @@
 # To run from within the python interpreter, use
 #
 # >>> import inout3
+# >>> inout3.inout3()
 
+import random
 import sys
 
 import cplex
@@ -50,13 +52,16 @@ nbProducts  = len(demand)
 nbResources = len(capacity)
 
 
-def inout3():
-    c = cplex.Cplex()
+def buildmodel(c, consumption, capacity, demand, insideCost, outsideCost):
+    """Populate c with the production planning problem.
 
-    # sys.stdout is the default output stream for log and results
-    # so these lines may be omitted
-    c.set_results_stream(sys.stdout)
-    c.set_log_stream(sys.stdout)
+    Returns (inside, outside, cost): the indices of the inside and
+    outside production variables and the index of the cost variable.
+    The rows are the cost row, one capacity row per resource and one
+    demand row per product, in this order.
+    """
+    nbProducts  = len(demand)
+    nbResources = len(capacity)
 
     # indices of the inside production variables
     inside  = range(0, nbProducts)
@@ -97,6 +102,37 @@ def inout3():
                              rhs = demand,
                              names = ["demand_"+str(i)
                                       for i in range(nbProducts)])
+    return inside, outside, cost
+
+
+def generate(nbProducts, nbResources, seed = 0):
+    """Return (consumption, capacity, demand, insideCost, outsideCost)
+    for a random instance of the given size.
+    """
+    rnd = random.Random(seed)
+    consumption = [[round(rnd.uniform(0.1, 0.6), 2) for p in range(nbProducts)]
+                   for i in range(nbResources)]
+    demand      = [float(rnd.randint(50, 300)) for p in range(nbProducts)]
+    # Inside production can cover about half of the demand.
+    capacity    = [0.5 * sum(consumption[i][p] * demand[p]
+                             for p in range(nbProducts))
+                   for i in range(nbResources)]
+    insideCost  = [round(rnd.uniform(0.2, 0.8), 2) for p in range(nbProducts)]
+    outsideCost = [cost + round(rnd.uniform(0.05, 0.3), 2)
+                   for cost in insideCost]
+    return consumption, capacity, demand, insideCost, outsideCost
+
+
+def inout3():
+    c = cplex.Cplex()
+
+    # sys.stdout is the default output stream for log and results
+    # so these lines may be omitted
+    c.set_results_stream(sys.stdout)
+    c.set_log_stream(sys.stdout)
+
+    inside, outside, cost = buildmodel(c, consumption, capacity, demand,
+                                       insideCost, outsideCost)
 
     # find cost-minimal solution
     c.solve()
@@ -122,4 +158,5 @@ def inout3():
        print "  outside: " , c.solution.get_values(outside[p])
 
 
-inout3()
+if __name__ == "__main__":
+    inout3()
@@ -0,0 +1,272 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: multiobj.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# multiobj.py -- Solving problems with several objectives
+#
+# inout3.py first minimizes cost, then bounds cost by 110 percent of its
+# minimum and minimizes outside production. The function lexicographic()
+# does this for any list of objectives: each objective is optimized in
+# turn, and before the next one, a row bounds it by its optimum plus a
+# relative tolerance. Each stage starts from the solution of the previous
+# one, which satisfies the new row: an LP from its basis, a MIP from the
+# solution as MIP start.
+#
+# The function epsilonconstraint() optimizes one objective with a second
+# objective bounded by each value of a grid, which yields points of the
+# Pareto front of the two objectives. The function paretosweep() does the
+# same in a pool of worker processes. Every worker builds the problem once
+# and solves a contiguous part of the grid, so that consecutive solves
+# start from each other.
+#
+# An objective is given as a list [ind, val] of variable indices and
+# coefficients, as a row is, and is minimized or maximized according to
+# the objective sense of the problem.
+#
+# To run from the command line, use
+#
+#    python multiobj.py [products [points [processes]]]
+#
+# This solves the problem of inout3.py for a generated instance
+# lexicographically, and sweeps the Pareto front of cost and outside
+# production.
+
+import cplex
+import inout3
+from multiprocessing import Pool, cpu_count
+import sys
+import time
+
+# Problem and epsilon row reused by all grid points solved in a worker
+# process.
+workerprob = None
+workerrow = None
+
+def setobjective(prob, objective, objectives):
+    """Make objective the objective of prob, clearing the coefficients of
+    the variables in all objectives.
+    """
+    coefs = {}
+    for ind, val in objectives:
+        for j in ind:
+            coefs[j] = 0.0
+    ind, val = objective
+    coefs.update(zip(ind, val))
+    prob.objective.set_linear(coefs.items())
+
+def boundsense(prob):
+    """Return the sense of a row that bounds the objective value from the
+    side it is optimized to.
+    """
+    if prob.objective.get_sense() == prob.objective.sense.minimize:
+        return "L"
+    return "G"
+
+def addstart(prob):
+    """Add the current solution of a MIP as MIP start."""
+    if prob.get_problem_type() == prob.problem_type.LP:
+        return
+    x = prob.solution.get_values()
+    prob.MIP_starts.add(cplex.SparsePair(ind = range(len(x)), val = x),
+                        prob.MIP_starts.effort_level.check_feasibility)
+
+def lexicographic(prob, objectives, tolerances):
+    """Optimize the objectives in order of priority.
+
+    After objective k is optimized, its value is bounded by the optimum
+    plus tolerances[k] times its absolute value, in the direction it was
+    optimized. The problem is restored when done, including the MIP
+    starts added between stages.
+
+    Returns (optima, x): the optimal value of each objective and the
+    final solution, or None for both if a stage has no solution.
+    """
+    original = prob.objective.get_linear()
+    first = prob.linear_constraints.get_num()
+    firststart = prob.MIP_starts.get_num()
+    sense = boundsense(prob)
+    optima = []
+    x = None
+    try:
+        for k in range(len(objectives)):
+            setobjective(prob, objectives[k], objectives)
+            prob.solve()
+            if not prob.solution.is_primal_feasible():
+                return None, None
+            optimum = prob.solution.get_objective_value()
+            optima.append(optimum)
+            x = prob.solution.get_values()
+            if k == len(objectives) - 1:
+                break
+            slack = tolerances[k] * abs(optimum)
+            if sense == "G":
+                slack = -slack
+            prob.linear_constraints.add(lin_expr = [objectives[k]],
+                                        senses = sense,
+                                        rhs = [optimum + slack])
+            addstart(prob)
+    finally:
+        last = prob.linear_constraints.get_num() - 1
+        if last >= first:
+            prob.linear_constraints.delete(first, last)
+        last = prob.MIP_starts.get_num() - 1
+        if last >= firststart:
+            prob.MIP_starts.delete(firststart, last)
+        prob.objective.set_linear(zip(range(len(original)), original))
+    return optima, x
+
+def epsilonconstraint(prob, objective, bounded, epsilons):
+    """Optimize objective with bounded <= epsilon for each epsilon in
+    epsilons, or bounded >= epsilon if the problem maximizes.
+
+    The objective of prob is replaced by objective and a row is added
+    for bounded; both stay in the problem. Returns the list of pairs
+    (value of objective, value of bounded) per epsilon, or None where no
+    solution exists.
+    """
+    setobjective(prob, objective, [objective])
+    row = prob.linear_constraints.get_num()
+    prob.linear_constraints.add(lin_expr = [bounded],
+                                senses = boundsense(prob),
+                                rhs = [epsilons[0]])
+    return solvegrid(prob, row, bounded, epsilons)
+
+def solvegrid(prob, row, bounded, epsilons):
+    ind, val = bounded
+    points = []
+    for epsilon in epsilons:
+        prob.linear_constraints.set_rhs(row, epsilon)
+        prob.solve()
+        if prob.solution.is_primal_feasible():
+            x = prob.solution.get_values()
+            points.append((prob.solution.get_objective_value(),
+                           sum(x[ind[i]] * val[i] for i in range(len(ind)))))
+        else:
+            points.append(None)
+    return points
+
+def initworker(build, args, objective, bounded):
+    """Build the problem reused by a worker process."""
+    global workerprob, workerrow
+    workerprob = cplex.Cplex()
+    workerprob.set_log_stream(None)
+    workerprob.set_results_stream(None)
+    build(workerprob, *args)
+    setobjective(workerprob, objective, [objective])
+    workerrow = workerprob.linear_constraints.get_num()
+    workerprob.linear_constraints.add(lin_expr = [bounded],
+                                      senses = boundsense(workerprob),
+                                      rhs = [0.0])
+
+def solveshard(task):
+    """Solve one part of the grid in a worker process.
+
+    The task argument is a tuple (key, bounded, epsilons). Returns a
+    tuple (key, points).
+    """
+    key, bounded, epsilons = task
+    return key, solvegrid(workerprob, workerrow, bounded, epsilons)
+
+def paretosweep(build, args, objective, bounded, epsilons, processes = None):
+    """Run epsilonconstraint() in a pool of worker processes.
+
+    Every worker creates a problem and populates it by build(prob, *args),
+    which must be a function defined at module level. The grid is split
+    into one contiguous part per process; the number of processes
+    defaults to the number of CPUs. Returns the points in the order of
+    epsilons.
+    """
+    pool = Pool(processes, initworker, (build, args, objective, bounded))
+    try:
+        size = max(1, -(-len(epsilons) // (processes or cpu_count())))
+        tasks = [(key, bounded, epsilons[key:key + size])
+                 for key in range(0, len(epsilons), size)]
+        points = [None] * len(epsilons)
+        for key, shard in pool.imap_unordered(solveshard, tasks):
+            points[key:key + len(shard)] = shard
+        return points
+    finally:
+        pool.terminate()
+
+def samepoint(p, q, tol = 1e-6):
+    """Return True if the grid points p and q, as returned by
+    epsilonconstraint(), have the same objective value within the
+    relative tolerance tol. The value of the bounded objective may
+    differ between alternative optima.
+    """
+    if p is None or q is None:
+        return p is None and q is None
+    return abs(p[0] - q[0]) <= tol * max(1.0, abs(p[0]))
+
+
+def multiobj(nbProducts, nbpoints, processes):
+    data = inout3.generate(nbProducts, 2)
+    prob = cplex.Cplex()
+    prob.set_log_stream(None)
+    prob.set_results_stream(None)
+    inside, outside, cost = inout3.buildmodel(prob, *data)
+
+    costobj = [[cost], [1.0]]
+    outsideobj = [outside, [1.0] * len(outside)]
+
+    # The two stages of inout3.py.
+    start = time.time()
+    optima, x = lexicographic(prob, [costobj, outsideobj], [0.1])
+    print "Lexicographic: cost %g, outside production %g, %.3f sec" % \
+          (x[cost], optima[1], time.time() - start)
+
+    # Outside production ranges from its minimum, without a bound on
+    # cost, to its value at minimal cost.
+    optima, x = lexicographic(prob, [outsideobj], [])
+    lo = optima[0]
+    optima, x = lexicographic(prob, [costobj], [])
+    hi = sum(x[j] for j in outside)
+    epsilons = [lo + (hi - lo) * k / max(1, nbpoints - 1)
+                for k in range(nbpoints)]
+
+    start = time.time()
+    points = epsilonconstraint(prob, costobj, outsideobj, epsilons)
+    print "Sequential sweep: %.3f sec" % (time.time() - start)
+    start = time.time()
+    parpoints = paretosweep(inout3.buildmodel, data, costobj, outsideobj,
+                            epsilons, processes)
+    print "Parallel sweep:   %.3f sec" % (time.time() - start)
+
+    # Both sweeps solve the same problems, so their objective values
+    # must agree.
+    print "%14s %14s %14s %14s %14s" % ("epsilon", "cost", "outside",
+                                        "seq. cost", "seq. outside")
+    differ = 0
+    for k in range(nbpoints):
+        row = [epsilons[k]]
+        for point in (parpoints[k], points[k]):
+            if point is None:
+                row.extend(["-", "-"])
+            else:
+                row.extend(["%g" % value for value in point])
+        print "%14g %14s %14s %14s %14s" % tuple(row)
+        if not samepoint(points[k], parpoints[k]):
+            differ += 1
+    print "Sweeps differ in %d of %d points" % (differ, nbpoints)
+
+if __name__ == "__main__":
+    nbProducts = 1000
+    nbpoints = 20
+    processes = None
+    if len(sys.argv) > 1:
+        nbProducts = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        nbpoints = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        processes = int(sys.argv[3])
+    multiobj(nbProducts, nbpoints, processes)
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: nodeselbench.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# nodeselbench.py -  Compare the node selection of admipex1.MyNode and
+#                    admipex1.HeapNode on large trees
+#
+# MyNode queries the depth and infeasibility sum of every remaining node
+# to select one; HeapNode pops the node from a heap filled by
+# admipex1.HeapBranch. To compare them with many open nodes, CPLEX selects
+# the nodes itself until there are threshold open nodes, and only then
+# the callbacks start to select. The time spent per selection is
+# measured until the node limit is reached.
+#
+# You can run this example at the command line by
+#
+#    python nodeselbench.py [filename [threshold [nodelimit]]]
+
+import admipex1
+import cplex
+import sys
+import time
+
+filename = "data/noswot.mps"
+threshold = 10000
+nodelimit = 50000
+
+def timedselector(base):
+    """Return a subclass of the node callback class base that lets CPLEX
+    select while fewer than threshold nodes remain and measures the time
+    of each selection made by base.
+    """
+    class TimedSelector(base):
+
+        def __call__(self):
+            remaining = self.get_num_remaining_nodes()
+            if remaining < self.threshold:
+                # The heap keeps the entries of the nodes CPLEX selects;
+                # drop them before they pile up.
+                if hasattr(self, "sync") and len(self.heap) > 2 * remaining:
+                    self.sync(remaining)
+                return
+            start = time.time()
+            base.__call__(self)
+            self.seconds += time.time() - start
+            self.selections += 1
+            self.remaining += remaining
+
+    return TimedSelector
+
+def runone(filename, branchclass, nodeclass, threshold, nodelimit):
+    """Solve filename with the given callbacks and return a tuple
+    (selections, mean remaining nodes, seconds per selection, nodes,
+    total seconds).
+    """
+    c = cplex.Cplex(filename)
+    c.set_log_stream(None)
+    c.set_results_stream(None)
+    c.parameters.mip.limits.nodes.set(nodelimit)
+    c.parameters.preprocessing.linear.set(0)
+    c.parameters.mip.strategy.search.set(
+        c.parameters.mip.strategy.search.values.traditional)
+
+    branch_instance = c.register_callback(branchclass)
+    branch_instance.times_called = 0
+    node_instance = c.register_callback(timedselector(nodeclass))
+    node_instance.times_called = 0
+    node_instance.threshold = threshold
+    node_instance.seconds = 0.0
+    node_instance.selections = 0
+    node_instance.remaining = 0
+    branch_instance.heap = node_instance.heap = []
+    branch_instance.selector = node_instance
+    node_instance.foreign = False
+    node_instance.scans = 0
+
+    start = time.time()
+    c.solve()
+    seconds = time.time() - start
+    selections = max(1, node_instance.selections)
+    return (node_instance.selections,
+            node_instance.remaining / float(selections),
+            node_instance.seconds / selections,
+            c.solution.progress.get_num_nodes_processed(), seconds)
+
+def nodeselbench(filename, threshold, nodelimit):
+    print "%-6s %10s %12s %16s %10s %10s" % ("select", "selections",
+                                            "remaining", "sec/selection",
+                                            "processed", "seconds")
+    for name, branchclass, nodeclass in \
+            [("scan", admipex1.MyBranch, admipex1.MyNode),
+             ("heap", admipex1.HeapBranch, admipex1.HeapNode)]:
+        selections, remaining, perselection, nodes, seconds = \
+                    runone(filename, branchclass, nodeclass, threshold,
+                           nodelimit)
+        print "%-6s %10d %12.1f %16.6f %10d %10.3f" % \
+              (name, selections, remaining, perselection, nodes, seconds)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        filename = sys.argv[1]
+    if len(sys.argv) > 2:
+        threshold = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        nodelimit = int(sys.argv[3])
+    nodeselbench(filename, threshold, nodelimit)
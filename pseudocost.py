@@ -0,0 +1,257 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: pseudocost.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# pseudocost.py -  Reliability branching with a branch callback
+#
+# admipex1.MyBranch branches on the most fractional variable. The branch
+# callback PseudocostBranch keeps, for every variable and both branching
+# directions, the number of observations and the sum of the objective
+# change per unit of change of the variable, in arrays of the array
+# module. Each child records the variable, the direction, the objective of
+# its parent and the distance the variable was moved in its node data;
+# when the branch callback is called for the child, the change of the
+# objective is added to the statistics.
+#
+# A variable is reliable once it has reliability observations in both
+# directions. Among the candidates that are not, at most maxstrong are
+# evaluated by strong branching: a copy of the LP relaxation with the
+# bounds of the current node is solved, and then solved again with each
+# bound changed, with at most itlim dual simplex iterations. The copy
+# does not contain the cuts CPLEX added, so these estimates are weaker
+# than those of CPLEX's own strong branching. The variable with the best
+# product of the estimated down and up changes is branched on.
+#
+# You can run this example at the command line by
+#
+#    python pseudocost.py [filename ...]
+#
+# This compares the number of nodes and the time of MyBranch and
+# PseudocostBranch on data/p0033.mps and data/noswot.mps by default.
+
+from array import array
+from math import floor
+
+import admipex1
+import cplex  as CPX
+import cplex.callbacks as CPX_CB
+import sys
+import time
+
+filenames = ["data/p0033.mps", "data/noswot.mps"]
+
+# time limit per solve in seconds
+timelimit = 300.0
+
+# smallest estimate used in the product score
+SCORE_EPS = 1e-6
+
+# estimate of a child whose strong branching LP is infeasible
+INFEASIBLE_GAIN = 1e20
+
+
+class PseudocostBranch(CPX_CB.BranchCallback):
+
+    def __call__(self):
+        self.times_called += 1
+        br_type = self.get_branch_type()
+        if br_type == self.branch_type.SOS1 or br_type == self.branch_type.SOS2:
+            return
+
+        x = self.get_values()
+        objval = self.get_objective_value()
+        feas = self.get_feasibilities()
+
+        data = self.get_node_data()
+        if data is not None:
+            self.update(data, objval)
+
+        infeasible = self.feasibility_status.infeasible
+        candidates = [j for j in range(len(x)) if feas[j] == infeasible]
+        if len(candidates) == 0:
+            return
+        down, up = self.estimates(candidates, x)
+        frac = [x[j] - floor(x[j]) for j in candidates]
+        scores = [(max(down[k] * frac[k], SCORE_EPS) *
+                   max(up[k] * (1.0 - frac[k]), SCORE_EPS), candidates[k], k)
+                  for k in range(len(candidates))]
+        score, bestj, k = max(scores)
+
+        xj_lo = floor(x[bestj])
+        self.make_branch(objval, variables = [(bestj, "L", xj_lo + 1)],
+                         node_data = (bestj, 1, objval, 1.0 - frac[k]))
+        self.make_branch(objval, variables = [(bestj, "U", xj_lo)],
+                         node_data = (bestj, 0, objval, frac[k]))
+
+    def update(self, data, objval):
+        """Add the objective change of the current node, created with the
+        given node data, to the statistics.
+        """
+        j, direction, parentobj, distance = data
+        if distance > 0.0:
+            self.count[direction][j] += 1
+            self.total[direction][j] += abs(objval - parentobj) / distance
+
+    def average(self, direction):
+        """Return the average of all observations in direction, used for
+        variables without observations.
+        """
+        count = sum(self.count[direction])
+        if count == 0:
+            return 1.0
+        return sum(self.total[direction]) / count
+
+    def estimates(self, candidates, x):
+        """Return the lists of estimated objective changes per unit down
+        and up for candidates.
+        """
+        down = []
+        up = []
+        unreliable = []
+        avg = [self.average(0), self.average(1)]
+        for k in range(len(candidates)):
+            j = candidates[k]
+            for direction, result in [(0, down), (1, up)]:
+                n = self.count[direction][j]
+                if n > 0:
+                    result.append(self.total[direction][j] / n)
+                else:
+                    result.append(avg[direction])
+            if min(self.count[0][j], self.count[1][j]) < self.reliability:
+                unreliable.append(k)
+        if len(unreliable) > 0 and self.maxstrong > 0:
+            # Evaluate the least observed candidates first.
+            unreliable.sort(key = lambda k: min(self.count[0][candidates[k]],
+                                                self.count[1][candidates[k]]))
+            self.strongbranch(candidates, unreliable[:self.maxstrong], x,
+                              down, up)
+        return down, up
+
+    def strongbranch(self, candidates, which, x, down, up):
+        """Replace the estimates of the candidates at positions which by
+        the result of strong branching on the LP copy.
+        """
+        lp = self.lp
+        numcols = len(x)
+        lb = self.get_lower_bounds()
+        ub = self.get_upper_bounds()
+        lp.variables.set_lower_bounds(zip(range(numcols), lb))
+        lp.variables.set_upper_bounds(zip(range(numcols), ub))
+        # The node LP is solved to optimality; only the children are
+        # limited to itlim iterations.
+        itlim = lp.parameters.simplex.limits.iterations
+        itlim.reset()
+        lp.solve()
+        status = lp.solution.status
+        if lp.solution.get_status() not in [status.optimal,
+                                            status.optimal_infeasible]:
+            return
+        base = lp.solution.get_objective_value()
+        itlim.set(self.itlim)
+        for k in which:
+            j = candidates[k]
+            xj_lo = floor(x[j])
+            frac = x[j] - xj_lo
+            for direction, result, distance in [(0, down, frac),
+                                                (1, up, 1.0 - frac)]:
+                if direction == 0:
+                    lp.variables.set_upper_bounds(j, xj_lo)
+                else:
+                    lp.variables.set_lower_bounds(j, xj_lo + 1)
+                lp.solve()
+                # optimal_infeasible is optimal, with infeasibilities
+                # after unscaling, so its objective is used.
+                if lp.solution.get_status() == status.infeasible:
+                    result[k] = INFEASIBLE_GAIN
+                elif lp.solution.get_status() == status.optimal_infeasible or \
+                     lp.solution.is_primal_feasible() or \
+                     lp.solution.is_dual_feasible():
+                    gain = abs(lp.solution.get_objective_value() - base) / \
+                           distance
+                    result[k] = gain
+                    self.count[direction][j] += 1
+                    self.total[direction][j] += gain
+                if direction == 0:
+                    lp.variables.set_upper_bounds(j, ub[j])
+                else:
+                    lp.variables.set_lower_bounds(j, lb[j])
+        self.strong += len(which)
+
+
+def setup(c, reliability = 4, maxstrong = 8, itlim = 50):
+    """Register a PseudocostBranch callback with c and return it.
+
+    Must be called after the problem is read.
+    """
+    numcols = c.variables.get_num()
+    lp = CPX.Cplex(c)
+    lp.set_log_stream(None)
+    lp.set_results_stream(None)
+    lp.set_warning_stream(None)
+    lp.set_problem_type(lp.problem_type.LP)
+    lp.parameters.lpmethod.set(lp.parameters.lpmethod.values.dual)
+
+    branch_instance = c.register_callback(PseudocostBranch)
+    branch_instance.times_called = 0
+    branch_instance.strong = 0
+    branch_instance.lp = lp
+    branch_instance.itlim = itlim
+    branch_instance.reliability = reliability
+    branch_instance.maxstrong = maxstrong
+    branch_instance.count = [array("i", [0] * numcols),
+                             array("i", [0] * numcols)]
+    branch_instance.total = [array("d", [0.0] * numcols),
+                             array("d", [0.0] * numcols)]
+    return branch_instance
+
+def runone(filename, usepseudocost):
+    """Solve filename and return (nodes, seconds, objective, strong)."""
+    c = CPX.Cplex(filename)
+    c.set_log_stream(None)
+    c.set_results_stream(None)
+    c.parameters.timelimit.set(timelimit)
+    c.parameters.preprocessing.linear.set(0)
+    c.parameters.mip.strategy.search.set(
+        c.parameters.mip.strategy.search.values.traditional)
+    if usepseudocost:
+        branch_instance = setup(c)
+    else:
+        branch_instance = c.register_callback(admipex1.MyBranch)
+        branch_instance.times_called = 0
+        branch_instance.strong = 0
+    start = time.time()
+    c.solve()
+    seconds = time.time() - start
+    if c.solution.is_primal_feasible():
+        objective = c.solution.get_objective_value()
+    else:
+        objective = CPX.infinity
+    return c.solution.progress.get_num_nodes_processed(), seconds, \
+           objective, branch_instance.strong
+
+def pseudocost(filenames):
+    print "%-20s %-12s %10s %10s %14s %8s" % ("problem", "branching",
+                                            "nodes", "seconds",
+                                            "objective", "strong")
+    for filename in filenames:
+        for name, usepseudocost in [("MyBranch", False),
+                                    ("pseudocost", True)]:
+            nodes, seconds, objective, strong = runone(filename,
+                                                       usepseudocost)
+            print "%-20s %-12s %10d %10.3f %14g %8d" % \
+                  (filename, name, nodes, seconds, objective, strong)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        filenames = sys.argv[1:]
+    pseudocost(filenames)
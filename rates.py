@@ -21,6 +21,11 @@
 # per unit output.  The question is which generators to use in order to
 # minimize the overall operation cost while satisfying the demand.
 #
+# The function buildcommitment() extends the model to several time
+# periods, with a demand per period, start-up costs, ramping limits and
+# minimum up and down times of the generators. See ratesbatch.py for
+# solving many demand profiles with it.
+#
 # To run this example from the command line, use
 #
 #    python rates.py
@@ -34,6 +39,98 @@ from cplex.exceptions import CplexSolverError
 from inputdata import read_dat_file
 import sys
 
+def buildcommitment(model, pmin, pmax, cost, startcost, ramp, minup, mindown,
+                    demand):
+    """Populate model with a multi-period unit commitment problem.
+
+    The first six arguments list per generator the minimal and maximal
+    power production while switched on, the cost per unit of power, the
+    cost of switching on, the most the production may change from one
+    period to the next while the generator stays on, and the minimal
+    number of periods it stays on after switching on and off after
+    switching off. demand lists the power demand per period. All
+    generators are off before the first period.
+
+    All variables are added in one call and all rows in another; the
+    first len(demand) rows are the demand rows. Returns
+    (power, on, startup, shutdown), lists of variable indices indexed by
+    generator and period.
+    """
+    generators = range(len(pmin))
+    periods = range(len(demand))
+    nbperiods = len(periods)
+    nbvars = len(generators) * nbperiods
+
+    # power[g][t] is the production of generator g in period t, and
+    # on[g][t], startup[g][t] and shutdown[g][t] are binaries that tell
+    # whether it is on, switched on or switched off in period t.
+    power = [range(g * nbperiods, (g + 1) * nbperiods) for g in generators]
+    on = [[nbvars + j for j in power[g]] for g in generators]
+    startup = [[2 * nbvars + j for j in power[g]] for g in generators]
+    shutdown = [[3 * nbvars + j for j in power[g]] for g in generators]
+
+    obj = [cost[g] for g in generators for t in periods] + \
+          [0.0] * nbvars + \
+          [startcost[g] for g in generators for t in periods] + \
+          [0.0] * nbvars
+    ub = [pmax[g] for g in generators for t in periods] + \
+         [1.0] * (2 * nbvars) + \
+         [float(t > 0) for g in generators for t in periods]
+    model.variables.add(obj = obj, ub = ub,
+                        types = "C" * nbvars + "B" * (3 * nbvars))
+    model.objective.set_sense(model.objective.sense.minimize)
+
+    # Require that the production satisfies the demand in every period.
+    rows = [[[power[g][t] for g in generators], [1.0] * len(generators)]
+            for t in periods]
+    senses = "G" * nbperiods
+    rhs = list(demand)
+
+    for g in generators:
+        for t in periods:
+            # A generator that is on produces between pmin and pmax.
+            rows.append([[power[g][t], on[g][t]], [1.0, -pmin[g]]])
+            rows.append([[power[g][t], on[g][t]], [1.0, -pmax[g]]])
+            senses += "GL"
+            rhs.extend([0.0, 0.0])
+
+            # Switching on and off changes the state.
+            if t == 0:
+                rows.append([[on[g][t], startup[g][t]], [1.0, -1.0]])
+            else:
+                rows.append([[on[g][t], on[g][t - 1], startup[g][t],
+                              shutdown[g][t]], [1.0, -1.0, -1.0, 1.0]])
+            senses += "E"
+            rhs.append(0.0)
+
+            # The production changes by at most ramp, unless the
+            # generator is switched on or off.
+            if t > 0:
+                rows.append([[power[g][t], power[g][t - 1], on[g][t - 1],
+                              startup[g][t]],
+                             [1.0, -1.0, -ramp[g], -pmax[g]]])
+                rows.append([[power[g][t - 1], power[g][t], on[g][t],
+                              shutdown[g][t]],
+                             [1.0, -1.0, -ramp[g], -pmax[g]]])
+                senses += "LL"
+                rhs.extend([0.0, 0.0])
+
+            # A generator switched on in the last minup periods is on,
+            # one switched off in the last mindown periods is off.
+            if minup[g] > 1:
+                ind = startup[g][max(0, t - minup[g] + 1):t + 1]
+                rows.append([ind + [on[g][t]], [1.0] * len(ind) + [-1.0]])
+                senses += "L"
+                rhs.append(0.0)
+            if mindown[g] > 1:
+                ind = shutdown[g][max(0, t - mindown[g] + 1):t + 1]
+                rows.append([ind + [on[g][t]], [1.0] * (len(ind) + 1)])
+                senses += "L"
+                rhs.append(1.0)
+
+    model.linear_constraints.add(lin_expr = rows, senses = senses, rhs = rhs)
+    return power, on, startup, shutdown
+
 if __name__ == "__main__":
 
     # Read in data file. If no file name is given on the command line
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: ratesbatch.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# ratesbatch.py -- solving many demand profiles of a unit commitment model
+#
+# A set of generators is generated at random, together with a number of
+# hourly demand profiles. Each profile is solved with the multi-period
+# model of rates.buildcommitment() in a pool of worker processes. Every
+# worker builds the model once; for each profile only the right hand sides
+# of the demand rows are changed before the model is solved again.
+#
+# For every profile the solve time in the worker and the latency, the
+# time from the start of the batch until its result arrived, are reported,
+# together with the throughput of the batch in profiles per second.
+#
+# To run this example from the command line, use
+#
+#    python ratesbatch.py [generators [periods [profiles [processes]]]]
+#
+# To run from within the python interpreter, use
+#
+# >>> import ratesbatch
+
+import cplex
+from multiprocessing import Pool
+import math
+import random
+from rates import buildcommitment
+import sys
+import time
+
+# time limit per profile in seconds
+timelimit = 60.0
+
+# Model reused by all profiles solved in a worker process.
+workermodel = None
+
+def generate(nbgenerators, seed = 0):
+    """Return the data of nbgenerators random generators as a tuple
+    (pmin, pmax, cost, startcost, ramp, minup, mindown).
+    """
+    rnd = random.Random(seed)
+    pmax = [float(rnd.randint(50, 500)) for g in range(nbgenerators)]
+    pmin = [p * rnd.uniform(0.2, 0.5) for p in pmax]
+    cost = [rnd.uniform(10.0, 50.0) for g in range(nbgenerators)]
+    startcost = [p * rnd.uniform(1.0, 5.0) for p in pmax]
+    ramp = [p * rnd.uniform(0.3, 1.0) for p in pmax]
+    minup = [rnd.randint(1, 8) for g in range(nbgenerators)]
+    mindown = [rnd.randint(1, 8) for g in range(nbgenerators)]
+    return pmin, pmax, cost, startcost, ramp, minup, mindown
+
+def profiles(capacity, nbperiods, nbprofiles, seed = 0):
+    """Return nbprofiles hourly demand profiles over nbperiods periods,
+    with a daily peak of at most 80 percent of capacity.
+    """
+    rnd = random.Random(seed)
+    result = []
+    for k in range(nbprofiles):
+        peak = capacity * rnd.uniform(0.5, 0.8)
+        result.append([peak * (0.7 + 0.3 * math.sin(math.pi * (t % 24 - 6)
+                                                     / 12.0)
+                               + rnd.uniform(-0.05, 0.05)) / 1.05
+                       for t in range(nbperiods)])
+    return result
+
+def initworker(units, nbperiods):
+    """Build the model reused by a worker process."""
+    global workermodel
+    workermodel = cplex.Cplex()
+    workermodel.set_log_stream(None)
+    workermodel.set_results_stream(None)
+    workermodel.parameters.timelimit.set(timelimit)
+    buildcommitment(workermodel, *units, demand = [0.0] * nbperiods)
+
+def solveprofile(task):
+    """Solve one demand profile in a worker process.
+
+    The task argument is a tuple (key, demand). Returns a tuple
+    (key, objective, seconds), where objective is None if no solution
+    was found.
+    """
+    key, demand = task
+    start = time.time()
+    workermodel.linear_constraints.set_rhs(zip(range(len(demand)), demand))
+    workermodel.solve()
+    if workermodel.solution.is_primal_feasible():
+        objective = workermodel.solution.get_objective_value()
+    else:
+        objective = None
+    return key, objective, time.time() - start
+
+def solvebatch(units, demands, processes = None):
+    """Solve a list of demand profiles in parallel.
+
+    units is a tuple as returned by generate() and all profiles in
+    demands must have the same number of periods. The number of worker
+    processes defaults to the number of CPUs.
+
+    This is a generator that yields a tuple
+    (key, objective, seconds, latency) for each profile as soon as it is
+    solved, where key is the position of the profile in demands and
+    latency the time since the batch was started.
+    """
+    start = time.time()
+    pool = Pool(processes, initworker, (units, len(demands[0])))
+    try:
+        tasks = [(key, demands[key]) for key in range(len(demands))]
+        for key, objective, seconds in pool.imap_unordered(solveprofile,
+                                                           tasks):
+            yield key, objective, seconds, time.time() - start
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    nbgenerators = 100
+    nbperiods = 24
+    nbprofiles = 20
+    processes = None
+    if len(sys.argv) > 1:
+        nbgenerators = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        nbperiods = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        nbprofiles = int(sys.argv[3])
+    if len(sys.argv) > 4:
+        processes = int(sys.argv[4])
+    units = generate(nbgenerators)
+    demands = profiles(sum(units[1]), nbperiods, nbprofiles)
+
+    start = time.time()
+    latencies = []
+    for key, objective, seconds, latency in solvebatch(units, demands,
+                                                       processes):
+        latencies.append(latency)
+        print "Profile %4d: cost %14s, solve %8.3f sec, latency %8.3f sec" \
+              % (key, objective, seconds, latency)
+    elapsed = time.time() - start
+    latencies.sort()
+    print "Solved %d profiles in %.3f sec, %.3f profiles/sec" % \
+          (nbprofiles, elapsed, nbprofiles / elapsed)
+    print "Median latency %.3f sec, maximal latency %.3f sec" % \
+          (latencies[len(latencies) // 2], latencies[-1])
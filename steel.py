@@ -26,9 +26,18 @@
 # production can be performed. All costs for this period have already
 # been accounted for and can be dropped from the model.
 #
+# The model can also be solved with a rolling horizon: only a window of
+# periods is optimized, the decisions of its first period are fixed and
+# the window slides forward. This is compared against the monolithic
+# model if a window size is given.
+#
+# The data is read from a data file. The model is built in bulk: the
+# variables of each product and period are laid out in contiguous index
+# ranges, and all variables and all rows are added in one call each.
+#
 # To run this example from the command line, use
 #
-#    python steel.py
+#    python steel.py [datafile [window]]
 #
 # To run from within the python interpreter, use
 #
@@ -36,32 +45,27 @@
 
 import cplex
 from cplex.exceptions import CplexSolverError
+from inputdata import read_dat_file
+import random
 import sys
 
-# Model data that is independent of the period.
-products = range(2)  # The products (from 0 to N-1).
-start = [ 10, 0 ]    # starting inventory per product.
-icost = [ 2.5, 3 ]   # Inventory cost per unit and product.
-prate = [ 200, 140 ] # Production rate per product.
-pcost = [ 10, 11 ]   # Production cost per unit and product.
-
-# Model data that depends on the period.
-periods = range(5)                        # The periods (from 0 to N-1)
-whours = [ 0, 40, 40, 32, 40 ]            # Maximum working time per period
-demand = [ [ 0, 6000, 6000, 4000, 6500 ], # Demand for product 0 per period.
-           [ 0, 4000, 2500, 3500, 4200 ]  # Demand for product 1 per period.
-           ]
-revenue = [ [ 0, 25, 26, 27, 27 ], # Revenue per unit and period for product 0.
-            [ 0, 30, 35, 37, 39 ]  # Revenue per unit and period for product 1.
-            ]
+# The model data is read from a data file, in this order:
+# whours  -- maximum working time per period
+# prate   -- production rate per product
+# start   -- starting inventory per product
+# pcost   -- production cost per unit and product
+# icost   -- inventory cost per unit and product
+# revenue -- revenue per unit, per product and period
+# demand  -- demand per product and period
+#
+# There are 5 periods in data/steel.dat: the time right before our
+# observation period starts, with no demand and no production, and the 4
+# weeks for which we plan.
 
 
 # Turn a two-dimensional array into a one dimensional array.
 def flatten(dim2):
-    ret = []
-    for i in dim2:
-        ret.extend(i)
-    return ret
+    return [x for row in dim2 for x in row]
 
 # Create and return a two-dimensional array. The first dimension is indexed
 # by values from IDX1 and the second dimension by IDX2 (both arguments are
@@ -69,44 +73,42 @@ def flatten(dim2):
 # The values in the array are subsequent numbers starting at START, i.e.
 # the value at cross[i][j] is i * len(IDX2) + j + START.
 def cross(idx1, idx2, start):
-    ret = []
-    for i in idx1:
-        ret.append(map(lambda d: d + start, idx2))
-        start += len(idx2)
-    return ret
+    n = len(idx2)
+    return [range(start + i * n, start + (i + 1) * n) for i in idx1]
 
-if __name__ == "__main__":
+def buildmodel(cpx, whours, prate, start, pcost, icost, revenue, demand):
+    """Populate cpx with the production model.
 
-    cpx = cplex.Cplex()
+    All variables are added in one call and all rows in another.
+    Returns (produce, inventorize, sell), the arrays of variable indices
+    indexed by product and period.
+    """
+    products = range(len(prate))
+    periods = range(len(whours))
+    nbvars = len(products) * len(periods)
 
     # Create arrays to reference variables. All arrays are indexed
     # by product and period index and have subsequent values that
     # serve as variable indices.
     produce = cross(products, periods, 0)
-    inventorize = cross(products, periods, len(products) * len(periods))
-    sell = cross(products, periods, 2 * len(products) * len(periods))
-
-    # Add variables with their lower bounds and objective function
-    # coefficients. Notice that variables are added carefully so that
-    # they are in 1-to-1-correspondance with the indices in the arrays
-    # produce, inventorize and sell.
-
-    # Production variables. Each unit produced incurs the respective
-    # production cost.
-    for p in products:
-        cpx.variables.add(obj = [ -pcost[p] ] * len(periods))
-
-    # Invetory variables. Each unit inventorized incurs the respective
-    # inventory cost. There is no inventory cost for the first period
-    # so we reset this explicitly.
-    for p in products:
-        cpx.variables.add(obj = [ -icost[p] ] * len(periods))
-        cpx.objective.set_linear(inventorize[p][0], 0)
-
-    # Sell variables. Each unit sold returns the respective revenue.
-    # As we cannot sell more than the market demand the upper bound
-    # for these variables is given by the market demand.
-    cpx.variables.add(obj = flatten(revenue), ub = flatten(demand))
+    inventorize = cross(products, periods, nbvars)
+    sell = cross(products, periods, 2 * nbvars)
+
+    # Add variables with their bounds and objective function
+    # coefficients, in 1-to-1-correspondance with the indices in the
+    # arrays produce, inventorize and sell.
+    # Each unit produced incurs the respective production cost.
+    # Each unit inventorized incurs the respective inventory cost. There
+    # is no inventory cost for the first period.
+    # Each unit sold returns the respective revenue. As we cannot sell
+    # more than the market demand the upper bound for these variables is
+    # given by the market demand.
+    nbperiods = len(periods)
+    obj = flatten([[-pcost[p]] * nbperiods for p in products]) + \
+          flatten([[0] + [-icost[p]] * (nbperiods - 1) for p in products]) + \
+          flatten(revenue)
+    ub = [cplex.infinity] * (2 * nbvars) + flatten(demand)
+    cpx.variables.add(obj = obj, ub = ub)
 
     # Our aim is to maximize profit.
     cpx.objective.set_sense(cpx.objective.sense.maximize)
@@ -114,12 +116,10 @@ if __name__ == "__main__":
     # Time required for production must satisfy working time limit.
     # The time required to produce one unit of product P is 1/R where
     # R is the production rate for P.
-    for period in periods:
-        lhs = [map(lambda p: produce[p][period], products),
-               map(lambda p: 1.0 / prate[p], products)]
-        cpx.linear_constraints.add(lin_expr = [lhs],
-                                   senses = ["L"],
-                                   rhs = [whours[period]])
+    rate = [1.0 / prate[p] for p in products]
+    rows = [[range(period, nbvars, nbperiods), rate] for period in periods]
+    senses = "L" * nbperiods
+    rhs = list(whours)
 
     # Balance constraint: For each period and product the amount sold and
     # inventorized must match the amount produced and received from previous
@@ -129,32 +129,148 @@ if __name__ == "__main__":
     for period in periods:
         for product in products:
             if period == 0:
-                ind = [ produce[product][period],
-                        sell[product][period], inventorize[product][period] ]
-                val = [ 1,
-                        -1, -1 ]
-                cpx.linear_constraints.add(lin_expr = [[ind, val]],
-                                           senses = ["E"],
-                                           rhs = [-start[product]])
+                rows.append([[produce[product][period], sell[product][period],
+                              inventorize[product][period]],
+                             [1, -1, -1]])
+                rhs.append(-start[product])
             else:
-                ind = [ inventorize[product][period - 1],
-                        produce[product][period],
-                        sell[product][period], inventorize[product][period] ]
-                val = [ 1, 1, -1, -1 ]
-                cpx.linear_constraints.add(lin_expr = [[ind, val]],
-                                           senses = ["E"],
-                                           rhs = [0])
+                rows.append([[inventorize[product][period - 1],
+                              produce[product][period],
+                              sell[product][period],
+                              inventorize[product][period]],
+                             [1, 1, -1, -1]])
+                rhs.append(0)
+    senses += "E" * nbvars
+    cpx.linear_constraints.add(lin_expr = rows, senses = senses, rhs = rhs)
+
+    return produce, inventorize, sell
+
+def generate(nbproducts, nbperiods, seed = 0):
+    """Return random data for nbproducts products and nbperiods periods,
+    in the order in which it is read from a data file. As in
+    data/steel.dat, the first period has no demand and no working time.
+    """
+    rnd = random.Random(seed)
+    prate = [rnd.randint(100, 250) for p in range(nbproducts)]
+    whours = [0] + [rnd.randint(32, 40) * nbproducts // 2
+                    for t in range(nbperiods - 1)]
+    start = [rnd.randint(0, 10) for p in range(nbproducts)]
+    pcost = [rnd.randint(8, 12) for p in range(nbproducts)]
+    icost = [rnd.uniform(1.0, 4.0) for p in range(nbproducts)]
+    revenue = [[0] + [rnd.randint(20, 40) for t in range(nbperiods - 1)]
+               for p in range(nbproducts)]
+    demand = [[0] + [rnd.randint(2000, 7000) for t in range(nbperiods - 1)]
+              for p in range(nbproducts)]
+    return whours, prate, start, pcost, icost, revenue, demand
+
+def periodvariables(produce, inventorize, sell, period):
+    """Return the indices of all variables of the given period."""
+    return [v[product][period] for v in (produce, inventorize, sell)
+            for product in range(len(produce))]
+
+def rollinghorizon(cpx, produce, inventorize, sell, window):
+    """Solve the model in cpx with a rolling horizon of window periods.
+
+    Only the periods in the current window are free; later periods are
+    hidden by fixing their variables to zero. The balance rows of the
+    first hidden period would then force the inventory at the end of the
+    window to zero, so the inventory of the last visible period is taken
+    out of them until that period slides into the window. The inventory
+    at the end of a window is thus free, but it costs and earns nothing
+    within the window, so each window keeps only as much as its own
+    periods need.
+
+    After each solve the decisions of the first period in the window are
+    fixed and the window slides forward by one period. The same problem
+    is modified by bound and coefficient changes only, so every solve
+    starts from the previous basis. On return the problem is restored.
+    Returns the objective value of the plan found, or None if a window
+    has no optimal solution.
+    """
+    nbproducts = len(produce)
+    periods = range(len(produce[0]))
+    allvars = [periodvariables(produce, inventorize, sell, period)
+               for period in periods]
+    ubs = cpx.variables.get_upper_bounds()
+
+    def link(period, coef):
+        # The balance row of product p in period t has index
+        # nbperiods + t * nbproducts + p; see buildmodel().
+        if 0 < period < len(periods):
+            cpx.linear_constraints.set_coefficients(
+                [(len(periods) + period * nbproducts + p,
+                  inventorize[p][period - 1], coef)
+                 for p in range(nbproducts)])
+
+    for period in periods[window:]:
+        cpx.variables.set_upper_bounds([(j, 0.0) for j in allvars[period]])
+    link(window, 0.0)
+
+    objective = None
+    try:
+        for period in periods:
+            cpx.solve()
+            if cpx.solution.get_status() != cpx.solution.status.optimal:
+                return None
+            values = cpx.solution.get_values(allvars[period])
+            cpx.variables.set_lower_bounds(zip(allvars[period], values))
+            cpx.variables.set_upper_bounds(zip(allvars[period], values))
+            if period + window < len(periods):
+                cpx.variables.set_upper_bounds(
+                    [(j, ubs[j]) for j in allvars[period + window]])
+                link(period + window, 1.0)
+                link(period + window + 1, 0.0)
+        objective = cpx.solution.get_objective_value()
+    finally:
+        for period in periods:
+            link(period, 1.0)
+            cpx.variables.set_lower_bounds([(j, 0.0) for j in allvars[period]])
+            cpx.variables.set_upper_bounds([(j, ubs[j])
+                                            for j in allvars[period]])
+    return objective
+
+if __name__ == "__main__":
+
+    datafile = "data/steel.dat"
+    if len(sys.argv) < 2:
+        print "Default data file : " + datafile
+    else:
+        datafile = sys.argv[1]
+    data = read_dat_file(datafile)
+    products = range(len(data[1]))
+    periods = range(len(data[0]))
+
+    cpx = cplex.Cplex()
+    produce, inventorize, sell = buildmodel(cpx, *data)
 
     # Solve the problem. Errors/exceptions will terminate the program.
+    begin = cpx.get_time()
     cpx.solve()
+    monolithic = cpx.get_time() - begin
     print "Solution status = ", cpx.solution.get_status()
     # Dump results.
     print "Total Profit = " + str(cpx.solution.get_objective_value())
     print
     print "\tp" + "\tt" + "\tMake" + "\tInv" + "\tSell"
+    x = cpx.solution.get_values()
     for product in products:
         for period in periods:
             print "\t" + str(product) + "\t" + str(period) \
-            + "\t" + str(cpx.solution.get_values(produce[product][period])) \
-            + "\t" + str(cpx.solution.get_values(inventorize[product][period])) \
-            + "\t" + str(cpx.solution.get_values(sell[product][period]))
+            + "\t" + str(x[produce[product][period]]) \
+            + "\t" + str(x[inventorize[product][period]]) \
+            + "\t" + str(x[sell[product][period]])
+
+    # With a window size on the command line, compare against a rolling
+    # horizon solve.
+    if len(sys.argv) > 2:
+        window = int(sys.argv[2])
+        profit = cpx.solution.get_objective_value()
+        begin = cpx.get_time()
+        rolling = rollinghorizon(cpx, produce, inventorize, sell, window)
+        print
+        if rolling is None:
+            print "Rolling horizon with window %d: no solution" % window
+            sys.exit(-1)
+        print "Rolling horizon with window %d: profit %g (loss %g), " \
+              "%.3f sec vs. %.3f sec" % (window, rolling, profit - rolling,
+                                         cpx.get_time() - begin, monolithic)
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: steelbench.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# steelbench.py -  Scale the multi period production model of steel.py
+#
+# Instances with thousands of products are generated with
+# steel.generate(). Each is built with steel.buildmodel() and solved,
+# and then solved again with a rolling horizon. The times to generate,
+# build and solve, and the profit lost by the rolling horizon are
+# reported.
+#
+# To run this example from the command line, use
+#
+#    python steelbench.py [periods [window [products ...]]]
+
+import cplex
+import steel
+import sys
+import time
+
+nbperiods = 13
+window = 4
+sizes = [100, 1000, 5000, 10000]
+
+def steelbench(nbperiods, window, sizes):
+    print "%8s %8s %8s %10s %10s %10s %10s %10s" % \
+          ("products", "columns", "rows", "generate", "build", "solve",
+           "rolling", "loss")
+    for nbproducts in sizes:
+        start = time.time()
+        data = steel.generate(nbproducts, nbperiods)
+        gentime = time.time() - start
+
+        cpx = cplex.Cplex()
+        cpx.set_log_stream(None)
+        cpx.set_results_stream(None)
+        start = time.time()
+        produce, inventorize, sell = steel.buildmodel(cpx, *data)
+        buildtime = time.time() - start
+
+        start = time.time()
+        cpx.solve()
+        solvetime = time.time() - start
+        profit = cpx.solution.get_objective_value()
+
+        start = time.time()
+        rolling = steel.rollinghorizon(cpx, produce, inventorize, sell,
+                                       window)
+        rollingtime = time.time() - start
+
+        if rolling is None:
+            loss = "-"
+        else:
+            loss = "%.2f" % (profit - rolling)
+        print "%8d %8d %8d %10.3f %10.3f %10.3f %10.3f %10s" % \
+              (nbproducts, cpx.variables.get_num(),
+               cpx.linear_constraints.get_num(),
+               gentime, buildtime, solvetime, rollingtime, loss)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        nbperiods = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        window = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        sizes = [int(arg) for arg in sys.argv[3:]]
+    steelbench(nbperiods, window, sizes)
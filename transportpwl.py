@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# --------------------------------------------------------------------------
+# File: transportpwl.py
+# Version 12.6
+# --------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2008, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with IBM Corp.
+# --------------------------------------------------------------------------
+#
+# transportpwl.py - Large transportation models with piecewise linear
+#                   costs.
+#
+# This example builds the model of transport.py for generated instances
+# of arbitrary size. The breakpoints of all arcs are computed up front,
+# all variables and all rows are added in a few calls, and only the SOS2
+# sets are added one per arc.
+#
+# When the slopes of the cost function are increasing (the convex case),
+# the SOS2 formulation is not needed: each arc gets one variable per
+# segment, with the slope as cost and the segment length as upper bound.
+# Since cheaper segments come first, the LP fills them in order, so no
+# branching is required.
+#
+# The break points are computed with NumPy if it is installed, and with
+# plain lists otherwise. Either way they are passed to CPLEX as lists.
+#
+# To run this example from the command line, use
+#
+#    python transportpwl.py [nbSupply nbDemand]
+#
+# This solves a generated instance (500 x 500 by default) with the convex
+# and the concave cost function and reports build and solve times.
+
+import cplex
+import random
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# x coordinates of the inner break points of the cost function
+breaks = [200.0, 400.0]
+
+convexslopes = [30.0, 80.0, 130.0]
+concaveslopes = [120.0, 80.0, 50.0]
+
+# time limit per solve in seconds
+timelimit = 600.0
+
+def generate(nbSupply, nbDemand, seed = 0):
+    """Return random (supply, demand) lists with equal totals."""
+    rnd = random.Random(seed)
+    demand = [float(rnd.randint(400, 1200)) for j in range(nbDemand)]
+    weights = [rnd.random() + 0.5 for i in range(nbSupply)]
+    supply = [sum(demand) * w / sum(weights) for w in weights]
+    return supply, demand
+
+def isconvex(slopes):
+    """Return True if the slopes are non-decreasing."""
+    return all(slopes[k] <= slopes[k + 1] for k in range(len(slopes) - 1))
+
+def breakpoints(supply, demand, slopes):
+    """Return the break points of the cost functions of all arcs.
+
+    The arc from supplier i to recipient j has index i * len(demand) + j.
+    Returns (pwl_x, pwl_y), flat lists holding the 4 break points of arc a
+    at positions 4 * a to 4 * a + 3. The last break point of each arc is
+    the largest amount it can carry.
+    """
+    if numpy is not None:
+        midval = numpy.minimum.outer(supply, demand).ravel()
+        x = numpy.column_stack([numpy.zeros(len(midval)),
+                                numpy.minimum(breaks[0], midval),
+                                numpy.minimum(breaks[1], midval), midval])
+        y = numpy.zeros(x.shape)
+        y[:, 1:] = numpy.cumsum(numpy.diff(x) * slopes, axis = 1)
+        return x.ravel().tolist(), y.ravel().tolist()
+    pwl_x = []
+    pwl_y = []
+    for s in supply:
+        for d in demand:
+            midval = min(s, d)
+            x = [0.0, min(breaks[0], midval), min(breaks[1], midval), midval]
+            y = [0.0]
+            for k in range(3):
+                y.append(y[k] + slopes[k] * (x[k + 1] - x[k]))
+            pwl_x.extend(x)
+            pwl_y.extend(y)
+    return pwl_x, pwl_y
+
+def flowrows(nbSupply, nbDemand, arcvars):
+    """Return the supply and demand rows over arcvars, where arcvars[a]
+    lists the variables whose sum is the amount shipped on arc a.
+    """
+    rows = []
+    for i in range(nbSupply):
+        ind = []
+        for arc in arcvars[i * nbDemand:(i + 1) * nbDemand]:
+            ind.extend(arc)
+        rows.append(cplex.SparsePair(ind = ind, val = [1.0] * len(ind)))
+    for j in range(nbDemand):
+        ind = []
+        for arc in arcvars[j::nbDemand]:
+            ind.extend(arc)
+        rows.append(cplex.SparsePair(ind = ind, val = [1.0] * len(ind)))
+    return rows
+
+def buildsos(model, supply, demand, slopes):
+    """Build the SOS2 model of transport.py in bulk.
+
+    Returns x, the indices of the shipment variables.
+    """
+    nbSupply = len(supply)
+    nbDemand = len(demand)
+    n = nbSupply * nbDemand
+    pwl_x, pwl_y = breakpoints(supply, demand, slopes)
+
+    model.objective.set_sense(model.objective.sense.minimize)
+
+    # x[a] is the amount shipped on arc a, y[a] its cost and
+    # lam[4*a:4*a+4] are the weights of its break points.
+    x = range(n)
+    y = range(n, 2 * n)
+    lam = range(2 * n, 6 * n)
+    model.variables.add(lb = [0.0] * n)
+    model.variables.add(obj = [1.0] * n, lb = [0.0] * n)
+    model.variables.add(lb = [0.0] * (4 * n))
+
+    # Supply must meet demand, and for every arc
+    # x = SUM(lambda_i*x_i)
+    # y = SUM(lambda_i*y_i)
+    # SUM(lambda_i) = 1
+    rows = flowrows(nbSupply, nbDemand, [[a] for a in x])
+    for a in range(n):
+        lambda_ind = lam[4 * a:4 * a + 4]
+        rows.append(cplex.SparsePair(ind = lambda_ind + [x[a]],
+                                     val = pwl_x[4 * a:4 * a + 4] + [-1.0]))
+        rows.append(cplex.SparsePair(ind = lambda_ind + [y[a]],
+                                     val = pwl_y[4 * a:4 * a + 4] + [-1.0]))
+        rows.append(cplex.SparsePair(ind = lambda_ind, val = [1.0] * 4))
+    model.linear_constraints.add(lin_expr = rows,
+                                 senses = "E" * len(rows),
+                                 rhs = supply + demand + [0.0, 0.0, 1.0] * n)
+
+    # The SOS2 weights only order the break points, which may coincide
+    # for arcs that carry at most 400 units.
+    for a in range(n):
+        model.SOS.add(type = "2",
+                      SOS = cplex.SparsePair(ind = lam[4 * a:4 * a + 4],
+                                             val = [1.0, 2.0, 3.0, 4.0]))
+    return x
+
+def buildconvex(model, supply, demand, slopes):
+    """Build the LP reformulation, valid if isconvex(slopes).
+
+    Returns seg, where seg[a] lists the indices of the segment variables
+    of arc a; their sum is the amount shipped on arc a.
+    """
+    nbSupply = len(supply)
+    nbDemand = len(demand)
+    n = nbSupply * nbDemand
+    pwl_x, pwl_y = breakpoints(supply, demand, slopes)
+
+    model.objective.set_sense(model.objective.sense.minimize)
+    model.variables.add(obj = slopes * n,
+                        lb = [0.0] * (3 * n),
+                        ub = [pwl_x[4 * a + k + 1] - pwl_x[4 * a + k]
+                              for a in range(n) for k in range(3)])
+    seg = [range(3 * a, 3 * a + 3) for a in range(n)]
+    model.linear_constraints.add(lin_expr = flowrows(nbSupply, nbDemand, seg),
+                                 senses = "E" * (nbSupply + nbDemand),
+                                 rhs = supply + demand)
+    return seg
+
+def solve(build, supply, demand, slopes):
+    """Build and solve a model, and return the build time, the solve time
+    and the objective value.
+    """
+    model = cplex.Cplex()
+    model.set_log_stream(None)
+    model.set_results_stream(None)
+    model.parameters.timelimit.set(timelimit)
+    start = time.time()
+    build(model, supply, demand, slopes)
+    buildtime = time.time() - start
+    start = time.time()
+    model.solve()
+    solvetime = time.time() - start
+    if model.solution.is_primal_feasible():
+        objective = model.solution.get_objective_value()
+    else:
+        objective = cplex.infinity
+    return buildtime, solvetime, objective
+
+def transportpwl(nbSupply, nbDemand):
+    supply, demand = generate(nbSupply, nbDemand)
+    print "%d suppliers, %d recipients" % (nbSupply, nbDemand)
+    print "%-8s %-6s %10s %10s %16s" % ("costs", "model", "build", "solve",
+                                       "objective")
+    for name, slopes in [("convex", convexslopes), ("concave", concaveslopes)]:
+        models = [("sos2", buildsos)]
+        if isconvex(slopes):
+            models.append(("lp", buildconvex))
+        for model, build in models:
+            buildtime, solvetime, objective = solve(build, supply, demand,
+                                                    slopes)
+            print "%-8s %-6s %10.3f %10.3f %16.2f" % (name, model, buildtime,
+                                                     solvetime, objective)
+
+if __name__ == "__main__":
+    nbSupply, nbDemand = 500, 500
+    if len(sys.argv) > 2:
+        nbSupply, nbDemand = int(sys.argv[1]), int(sys.argv[2])
+    transportpwl(nbSupply, nbDemand)
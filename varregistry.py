@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: varregistry.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# varregistry.py -  Build models through integer indices
+#
+# Referring to variables by name in constraints, bounds and queries makes
+# the Python API resolve every name to an index. The class
+# VariableRegistry hands out the integer indices of variables when they
+# are created and keeps their names in Python. The names are only set in
+# the model when it is written to a file.
+#
+# Run from the command line
+#
+#    python varregistry.py [numvars]
+#
+# to compare the time to build a model through names and through indices.
+
+import cplex
+import sys
+import time
+
+
+class VariableRegistry:
+
+    def __init__(self, prob):
+        self.prob = prob
+        self.names = []
+        self.named = 0
+
+    def add(self, names, **kwargs):
+        """Add one variable per entry in names to the problem.
+
+        The keyword arguments are passed on to variables.add(). Returns
+        the list of indices of the new variables.
+        """
+        start = self.prob.variables.get_num()
+        if start != len(self.names):
+            # Variables were added without the registry.
+            self.names.extend([None] * (start - len(self.names)))
+        # The names are not passed on, so make sure the number of
+        # variables is known from the other arguments.
+        kwargs.setdefault("lb", [0.0] * len(names))
+        self.prob.variables.add(**kwargs)
+        self.names.extend(names)
+        return range(start, start + len(names))
+
+    def name(self, index):
+        """Return the name of the variable with the given index."""
+        return self.names[index]
+
+    def setnames(self):
+        """Set the names of all variables created since the last call in
+        the problem.
+        """
+        self.prob.variables.set_names([(j, self.names[j])
+                                       for j in range(self.named,
+                                                      len(self.names))
+                                       if self.names[j] is not None])
+        self.named = len(self.names)
+
+    def write(self, filename, filetype = ""):
+        """Write the problem to filename, with variable names."""
+        self.setnames()
+        self.prob.write(filename, filetype)
+
+
+def buildbyname(prob, numvars):
+    """Build a chain of numvars variables referring to them by name."""
+    names = ["x" + str(j) for j in range(numvars)]
+    prob.variables.add(names = names, obj = [1.0] * numvars)
+    prob.linear_constraints.add(
+        lin_expr = [cplex.SparsePair([names[j], names[j + 1]], [1.0, 1.0])
+                    for j in range(numvars - 1)],
+        senses = "G" * (numvars - 1), rhs = [1.0] * (numvars - 1))
+    prob.variables.set_upper_bounds(zip(names, [10.0] * numvars))
+    return names
+
+def buildbyindex(prob, numvars):
+    """Build the model of buildbyname() through a VariableRegistry."""
+    registry = VariableRegistry(prob)
+    x = registry.add(["x" + str(j) for j in range(numvars)],
+                     obj = [1.0] * numvars)
+    prob.linear_constraints.add(
+        lin_expr = [cplex.SparsePair([x[j], x[j + 1]], [1.0, 1.0])
+                    for j in range(numvars - 1)],
+        senses = "G" * (numvars - 1), rhs = [1.0] * (numvars - 1))
+    prob.variables.set_upper_bounds(zip(x, [10.0] * numvars))
+    return x
+
+def varregistry(numvars):
+    for name, build in [("names", buildbyname), ("indices", buildbyindex)]:
+        prob = cplex.Cplex()
+        prob.set_results_stream(None)
+        prob.set_log_stream(None)
+        start = time.time()
+        handles = build(prob, numvars)
+        buildtime = time.time() - start
+        prob.solve()
+        start = time.time()
+        prob.solution.get_values(handles)
+        querytime = time.time() - start
+        print "%-8s build %8.3f sec, query %8.3f sec" % (name, buildtime,
+                                                         querytime)
+
+if __name__ == "__main__":
+    numvars = 100000
+    if len(sys.argv) > 1:
+        numvars = int(sys.argv[1])
+    varregistry(numvars)
@@ -19,16 +19,24 @@
 #                 total cost.  The minimum usage levels are
 #                 enforced by using semi-integer variables.
 #
+# All loads are identical, so the model with one binary per load and
+# warehouse is highly symmetric. With the option -a, identical loads are
+# grouped into classes and the model uses one integer count per class
+# and warehouse instead. See warehousebench.py for a comparison.
+#
 # To run this example from the command line, use
 #
-#    python warehouse.py
+#    python warehouse.py [-a]
 #
 # To run from within the python interpreter, use
 #
 # >>> import warehouse
+# >>> warehouse.warehouse()
 
 from math import fabs
 import cplex
+from varregistry import VariableRegistry
+import sys
 
 # number of warehouses
 nbwhouses = 4
@@ -42,71 +50,164 @@ costs = [1, 2, 4, 6]
 # minimum capacity of warehouse if open
 caplbs = [2, 3, 5, 7]
 
-# problem variables
-assignvars = []
-capvars = []
+# maximum capacity of warehouse
+capubs = [10] * nbwhouses
+
+# cost of storing each load in each warehouse: loadcosts[j][i] is the cost
+# of storing load j in warehouse i. Loads with equal costs are identical;
+# here all loads are.
+loadcosts = [[0] * nbwhouses] * nbloads
+
+def setupproblem(c, loadcosts = loadcosts, caplbs = caplbs, capubs = capubs):
+    """Set up the model with one binary per load and warehouse.
 
-def setupproblem(c):
+    Returns (assignvars, capvars, registry): the indices of the
+    assignment and capacity variables and the VariableRegistry that
+    holds their names.
+    """
+
+    nbloads = len(loadcosts)
+    registry = VariableRegistry(c)
 
     c.objective.set_sense(c.objective.sense.minimize)
 
     # assignment variables: assignvars[i][j] = 1 if load j is assigned to
     #                                            warehouse i
-    allassignvars = []
-    for i in range(nbwhouses):
-        assignvars.append([])
-        for j in range(nbloads):
-            varname = "assign_"+str(i)+"_"+str(j)
-            allassignvars.append(varname)
-            assignvars[i].append(varname)
-    c.variables.add(names = allassignvars, lb = [0] * len(allassignvars),
-                    ub = [1] * len(allassignvars),
-                    types = ["B"] * len(allassignvars))
+    allassignvars = registry.add(
+        ["assign_"+str(i)+"_"+str(j)
+         for i in range(nbwhouses) for j in range(nbloads)],
+        lb = [0] * (nbwhouses * nbloads), ub = [1] * (nbwhouses * nbloads),
+        types = ["B"] * (nbwhouses * nbloads),
+        obj = [loadcosts[j][i]
+               for i in range(nbwhouses) for j in range(nbloads)])
+    assignvars = [allassignvars[i * nbloads:(i + 1) * nbloads]
+                  for i in range(nbwhouses)]
 
     # capacity of warehouses: capvars[i] = number of loads assigned to
     #                                      warehouse i
     # We can either not use a warehouse (capvars[i] = 0) or use it with at
     # least the specified minimum capacity (capvars[i] >= caplbs[i]). This is
     # modeled by using semi-integer variables (type 'N').
-    for i in range(nbwhouses):
-        capvarname = "cap_"+str(i)
-        capvars.append(capvarname)
-    c.variables.add(names = capvars, lb = caplbs, ub = [10] * len(capvars),
-                    types = ["N"] * len(capvars), obj = costs)
-
+    capvars = registry.add(["cap_"+str(i) for i in range(nbwhouses)],
+                           lb = caplbs, ub = capubs,
+                           types = ["N"] * nbwhouses, obj = costs)
 
     # count loads assigned to warehouses:
     #   capvars[i] - sum_j (assignvars[i][j]) = 0
-    for i in range(nbwhouses):
-        thevars = [capvars[i]]
-        thecoefs = [-1]
-        for j in range(nbloads):
-            thevars.append(assignvars[i][j])
-            thecoefs.append(1)
-        c.linear_constraints.add(lin_expr =
-                                 [cplex.SparsePair(thevars, thecoefs)],
-                                 senses = ["E"], rhs = [0])
-    
     # Each load must be assigned to exactly one warehouse:
     #    sum_i (assignvars[i][j]) = 1
-    for j in range(nbloads):
-        thevars = []
-        for i in range(nbwhouses):
-            thevars.append(assignvars[i][j])
-        c.linear_constraints.add(lin_expr =
-                                 [cplex.SparsePair(thevars,
-                                                   [1] * len(thevars))],
-                                 senses = ["E"], rhs = [1])
+    c.linear_constraints.add(
+        lin_expr = [cplex.SparsePair([capvars[i]] + assignvars[i],
+                                     [-1] + [1] * nbloads)
+                    for i in range(nbwhouses)] +
+                   [cplex.SparsePair([assignvars[i][j]
+                                      for i in range(nbwhouses)],
+                                     [1] * nbwhouses)
+                    for j in range(nbloads)],
+        senses = ["E"] * (nbwhouses + nbloads),
+        rhs = [0] * nbwhouses + [1] * nbloads)
+
+    return assignvars, capvars, registry
+
+
+def loadclasses(loadcosts):
+    """Group identical loads into classes.
+
+    Two loads are identical if they have the same cost in every
+    warehouse. Returns a list of classes, each a list of load indices, in
+    order of first appearance.
+    """
+    classes = {}
+    order = []
+    for j in range(len(loadcosts)):
+        key = tuple(loadcosts[j])
+        if key not in classes:
+            classes[key] = []
+            order.append(key)
+        classes[key].append(j)
+    return [classes[key] for key in order]
+
+
+def setupaggregated(c, loadcosts = loadcosts, caplbs = caplbs,
+                    capubs = capubs):
+    """Set up the model with one integer count per load class and
+    warehouse instead of one binary per load and warehouse.
+
+    This removes the symmetry between identical loads. Returns
+    (classes, countvars, capvars, registry): the load classes as computed
+    by loadclasses(), the indices of the count and capacity variables and
+    the VariableRegistry that holds their names.
+    """
+
+    classes = loadclasses(loadcosts)
+    nbclasses = len(classes)
+    registry = VariableRegistry(c)
 
+    c.objective.set_sense(c.objective.sense.minimize)
+
+    # count variables: countvars[i][k] = number of loads of class k
+    #                                    assigned to warehouse i
+    allcountvars = registry.add(
+        ["count_"+str(i)+"_"+str(k)
+         for i in range(nbwhouses) for k in range(nbclasses)],
+        lb = [0] * (nbwhouses * nbclasses),
+        ub = [len(classes[k])
+              for i in range(nbwhouses) for k in range(nbclasses)],
+        types = ["I"] * (nbwhouses * nbclasses),
+        obj = [loadcosts[classes[k][0]][i]
+               for i in range(nbwhouses) for k in range(nbclasses)])
+    countvars = [allcountvars[i * nbclasses:(i + 1) * nbclasses]
+                 for i in range(nbwhouses)]
+
+    # capacity of warehouses as in setupproblem()
+    capvars = registry.add(["cap_"+str(i) for i in range(nbwhouses)],
+                           lb = caplbs, ub = capubs,
+                           types = ["N"] * nbwhouses, obj = costs)
 
-def warehouse():
+    # count loads assigned to warehouses:
+    #   capvars[i] - sum_k (countvars[i][k]) = 0
+    # All loads of each class must be assigned:
+    #   sum_i (countvars[i][k]) = size of class k
+    c.linear_constraints.add(
+        lin_expr = [cplex.SparsePair([capvars[i]] + countvars[i],
+                                     [-1] + [1] * nbclasses)
+                    for i in range(nbwhouses)] +
+                   [cplex.SparsePair([countvars[i][k]
+                                      for i in range(nbwhouses)],
+                                     [1] * nbwhouses)
+                    for k in range(nbclasses)],
+        senses = ["E"] * (nbwhouses + nbclasses),
+        rhs = [0] * nbwhouses + [len(members) for members in classes])
+
+    return classes, countvars, capvars, registry
+
+
+def disaggregate(classes, counts):
+    """Turn counts[i][k], the number of loads of class k assigned to
+    warehouse i, into the list of loads assigned to each warehouse.
+    """
+    loads = [[] for i in range(len(counts))]
+    for k in range(len(classes)):
+        members = iter(classes[k])
+        for i in range(len(counts)):
+            for n in range(int(round(counts[i][k]))):
+                loads[i].append(members.next())
+    for i in range(len(loads)):
+        loads[i].sort()
+    return loads
+
+
+def warehouse(aggregate = False):
 
     c = cplex.Cplex()
 
     # Set an overall node limit
     c.parameters.mip.limits.nodes.set(5000)
 
-    setupproblem(c)
+    if aggregate:
+        classes, countvars, capvars, registry = setupaggregated(c)
+    else:
+        assignvars, capvars, registry = setupproblem(c)
 
     c.solve()
 
@@ -120,16 +221,21 @@ def warehouse():
 
     if sol.is_primal_feasible():
         print "Solution value  = ", sol.get_objective_value()
+        # Fetch all values at once and look them up by index.
+        x = sol.get_values()
+        if aggregate:
+            loads = disaggregate(classes, [[x[v] for v in countvars[i]]
+                                           for i in range(nbwhouses)])
+        else:
+            loads = [[j for j in range(nbloads) if x[assignvars[i][j]] > 0.5]
+                     for i in range(nbwhouses)]
         for i in range(nbwhouses):
-            print "Warehouse %d capacity = %d" % (i, sol.get_values(capvars[i]))
+            print "Warehouse %d capacity = %d" % (i, x[capvars[i]])
             print "  loads:",
-            for j in range(nbloads):
-                if sol.get_values(assignvars[i][j]) > 0.5:
-                    print j,
-            print
+            print " ".join(str(j) for j in loads[i])
     else:
         print "No solution available."
 
 
-warehouse()
-
+if __name__ == "__main__":
+    warehouse(len(sys.argv) > 1 and sys.argv[1] == "-a")
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# ---------------------------------------------------------------------------
+# File: warehousebench.py
+# Version 12.6
+# ---------------------------------------------------------------------------
+# Licensed Materials - Property of IBM
+# 5725-A06 5725-A29 5724-Y48 5724-Y49 5724-Y54 5724-Y55 5655-Y21
+# Copyright IBM Corporation 2009, 2013. All Rights Reserved.
+#
+# US Government Users Restricted Rights - Use, duplication or
+# disclosure restricted by GSA ADP Schedule Contract with
+# IBM Corp.
+# ---------------------------------------------------------------------------
+#
+# warehousebench.py -  Compare the per-load and the aggregated models of
+#                      warehouse.py
+#
+# Instances with hundreds of loads are generated. Every load gets a
+# storage cost in each warehouse from one of a few cost profiles, so the
+# loads fall into a few classes of identical loads. Each instance is
+# solved with warehouse.setupproblem(), which has one binary per load and
+# warehouse, and with warehouse.setupaggregated(), which has one integer
+# count per load class and warehouse.
+#
+# To run this example from the command line, use
+#
+#    python warehousebench.py [nbclasses [nbloads ...]]
+
+import cplex
+import random
+import sys
+import time
+import warehouse
+
+nbclasses = 3
+sizes = [100, 200, 400]
+
+# time limit per solve in seconds
+timelimit = 60.0
+
+def generate(nbloads, nbclasses, seed = 0):
+    """Return (loadcosts, caplbs, capubs) for an instance with nbloads
+    loads drawn from nbclasses cost profiles.
+    """
+    rnd = random.Random(seed)
+    profiles = [[rnd.randint(0, 3) for i in range(warehouse.nbwhouses)]
+                for k in range(nbclasses)]
+    loadcosts = [profiles[rnd.randrange(nbclasses)] for j in range(nbloads)]
+    caplbs = [lb * nbloads // warehouse.nbloads for lb in warehouse.caplbs]
+    capubs = [nbloads // 2] * warehouse.nbwhouses
+    return loadcosts, caplbs, capubs
+
+def timesolve(setup, loadcosts, caplbs, capubs):
+    """Build and solve a model with setup and return the build time, the
+    solve time, the number of nodes and the objective value.
+    """
+    c = cplex.Cplex()
+    c.set_log_stream(None)
+    c.set_results_stream(None)
+    c.parameters.timelimit.set(timelimit)
+    start = time.time()
+    setup(c, loadcosts, caplbs, capubs)
+    buildtime = time.time() - start
+    start = time.time()
+    c.solve()
+    solvetime = time.time() - start
+    if c.solution.is_primal_feasible():
+        objective = c.solution.get_objective_value()
+    else:
+        objective = cplex.infinity
+    return buildtime, solvetime, \
+           c.solution.progress.get_num_nodes_processed(), objective
+
+def warehousebench(nbclasses, sizes):
+    print "%8s %10s %10s %10s %10s %12s" % ("loads", "model", "build",
+                                           "solve", "nodes", "objective")
+    for nbloads in sizes:
+        loadcosts, caplbs, capubs = generate(nbloads, nbclasses)
+        for name, setup in [("per-load", warehouse.setupproblem),
+                            ("aggregated", warehouse.setupaggregated)]:
+            buildtime, solvetime, nodes, objective = \
+                       timesolve(setup, loadcosts, caplbs, capubs)
+            print "%8d %10s %10.3f %10.3f %10d %12g" % \
+                  (nbloads, name, buildtime, solvetime, nodes, objective)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        nbclasses = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        sizes = [int(arg) for arg in sys.argv[2:]]
+    warehousebench(nbclasses, sizes)